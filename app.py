@@ -4,12 +4,24 @@ import pandas as pd
 import streamlit as st
 import json
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from src.components.event import ChatProcessor, ContentExtractor
-from src.components.geolocation import GeoDataMethods
+from src.components.Prompt_template import PromptTemplateGenerator
+from src.components.geolocation import GeoDataMethods, GeoFetchStats
+from src.components.local_extractor import CascadeProcessor, RuleBasedExtractor
+from src.components.rate_limiter import RequestScheduler
+from src.components.single_flight import SingleFlight
 from src.components.visualize import create_map_with_geojson
+from src.pipeline.checkpoint import CheckpointStore
+from src.pipeline.job_scheduler import JobScheduler
 from src.utils import load_model, setup_logging
 import os
+import copy
+import time
+import hashlib
+import threading
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -17,6 +29,15 @@ logger = logging.getLogger(__name__)
 # Ensure artifacts directory exists
 ARTIFACTS_DIR = "artifacts"
 os.makedirs(ARTIFACTS_DIR, exist_ok=True)
+CHECKPOINT_DIR = os.path.join(ARTIFACTS_DIR, "checkpoints")
+# Seconds the web interface waits before showing whatever stages have finished
+WEB_TIMEOUT = 60
+
+# Documents analysed at once by the process-wide job scheduler
+JOB_WORKERS = 4
+
+# LLM prompt types, each one stage; geocoding runs after "locations"
+LLM_STAGES = ["event_type", "entities", "names", "phone_numbers", "locations"]
 
 @dataclass
 class ProcessingResult:
@@ -28,14 +49,58 @@ class ProcessingResult:
     phone: str
     geojson_data: List[Dict]
     raw_text: str
+    geo_stats: Dict = field(default_factory=dict)
+    # Per stage: "ok", "resumed" (from checkpoint), "failed" or "timeout"
+    status: Dict[str, str] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def complete(self) -> bool:
+        return all(state in ("ok", "resumed") for state in self.status.values())
 
 class EntityExplorer:
     """Main class for processing and analyzing text data"""
+
+    # Identical documents submitted concurrently (from any session or feed) are analysed once
+    inflight = SingleFlight("document")
+    # RPM/TPM budgets are per API key, so explorers share one scheduler unless given their own
+    default_scheduler = RequestScheduler()
+    # Web, batch and fleet analyses are dispatched by priority through one JobScheduler, created on first use
+    _jobs: Optional[JobScheduler] = None
+    _jobs_lock = threading.Lock()
+    # Stage threads for every explorer: each concurrent job can run all its stages at once, with room
+    # for stages that outlived their job's deadline, so a job's deadline is not spent queueing here
+    _stage_executor = ThreadPoolExecutor(
+        max_workers=JOB_WORKERS * (len(LLM_STAGES) + 1), thread_name_prefix="stage"
+    )
     
-    def __init__(self):
+    def __init__(
+            self,
+            lazy_polygons: bool = True,
+            scheduler: Optional[RequestScheduler] = None,
+            checkpoint_dir: str = CHECKPOINT_DIR,
+            local_tier: bool = False,
+            local_threshold: float = 0.8,
+            local_thresholds: Optional[Dict[str, float]] = None,
+            ):
         try:
+            self.lazy_polygons = lazy_polygons
+            self.local_tier = local_tier
+            self.checkpoints = CheckpointStore(checkpoint_dir)
             self.client = load_model()
-            self.chat_processor = ChatProcessor(self.client)
+            self.scheduler = scheduler or EntityExplorer.default_scheduler
+            self.chat_processor = ChatProcessor(self.client, scheduler=self.scheduler)
+            # Answers depend on the models and prompts, so they are part of the checkpoint and coalescing keys
+            self.answer_version = (
+                self.chat_processor.model_name,
+                self.chat_processor.llama_model_name,
+                PromptTemplateGenerator.PROMPT_VERSION,
+            )
+            if local_tier:
+                # Answer from the offline rule-based tier when confident, escalate to the LLM otherwise
+                self.chat_processor = CascadeProcessor(
+                    RuleBasedExtractor(), self.chat_processor, local_threshold, local_thresholds
+                )
             self.content_extractor = ContentExtractor()
             self.geo_data_methods = GeoDataMethods()
         except Exception as e:
@@ -46,7 +111,7 @@ class EntityExplorer:
         """Validate user input text"""
         return bool(text and text.strip())
 
-    def process_locations(self, locations_text: str) -> pd.DataFrame:
+    def process_locations(self, locations_text: str, stats: Optional[GeoFetchStats] = None) -> pd.DataFrame:
         """Process location data and return geodata DataFrame"""
         try:
             locations = self.content_extractor.extract_locations(locations_text)
@@ -58,7 +123,9 @@ class EntityExplorer:
             
             # Process geodata
             processed_df['Geo_Data'], processed_df['Geo_Locations'] = zip(
-                *processed_df['Split_location'].apply(self.geo_data_methods.fetch_geojson_for_locations)
+                *processed_df['Split_location'].apply(
+                    self.geo_data_methods.fetch_geojson_for_locations, lazy=self.lazy_polygons, stats=stats
+                )
             )
             
             return self.geo_data_methods.categorize_geojson(processed_df)
@@ -67,50 +134,210 @@ class EntityExplorer:
             raise
 
 
-    def process_text(self, text: str) -> Optional[ProcessingResult]:
-        """Process input text and return structured results"""
+    def _document_key(self, text: str) -> tuple:
+        return (
+            hashlib.sha256((text or "").encode("utf-8")).hexdigest(),
+            self.lazy_polygons,
+            self.local_tier,
+            self.answer_version,
+        )
+
+    def process_text(self, text: str, timeout: Optional[float] = None) -> Optional[ProcessingResult]:
+        """
+        Process input text, sharing the work with any identical analysis already running.
+        With a timeout (seconds), stages still running at the deadline are reported as
+        "timeout" and the partial result is returned; they keep checkpointing in the background.
+        """
+        # A shared analysis is only awaited until our own deadline, then we return what is checkpointed
+        deadline = None if timeout is None else time.monotonic() + timeout
+        result = EntityExplorer.inflight.do(self._document_key(text), self._process_text, text, deadline, deadline=deadline)
+        # Each caller gets its own copy, the map view mutates geojson_data in place
+        return copy.deepcopy(result)
+
+    async def process_text_async(self, text: str, timeout: Optional[float] = None) -> Optional[ProcessingResult]:
+        """Async variant of process_text, coalesced with threaded callers"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        result = await EntityExplorer.inflight.do_async(
+            self._document_key(text), self._process_text, text, deadline, deadline=deadline
+        )
+        return copy.deepcopy(result)
+
+    @classmethod
+    def job_scheduler(cls) -> JobScheduler:
+        """The process-wide JobScheduler shared by every explorer"""
+        with cls._jobs_lock:
+            if cls._jobs is None:
+                cls._jobs = JobScheduler(cls._run_job, max_workers=JOB_WORKERS)
+            return cls._jobs
+
+    @staticmethod
+    def _run_job(explorer: "EntityExplorer", text: str, deadline: Optional[float]) -> Optional[ProcessingResult]:
+        timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+        return explorer.process_text(text, timeout=timeout)
+
+    def submit(self, text: str, priority: str = "normal", timeout: Optional[float] = None) -> Future:
+        """
+        Queue the analysis in a priority class ("interactive", "normal" or "bulk")
+        and return a Future of its result. The timeout covers queueing and
+        processing; a job still queued at the deadline fails with TimeoutError.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        return self.job_scheduler().submit(self, text, deadline, priority=priority, timeout=timeout)
+
+    @staticmethod
+    def coalescing_stats() -> Dict[str, Dict[str, int]]:
+        """How often identical in-flight work was shared at each level"""
+        return {
+            "documents": EntityExplorer.inflight.stats(),
+            "completions": ChatProcessor.inflight.stats(),
+            "geocoding": GeoDataMethods.inflight.stats(),
+        }
+
+    def checkpoint_key(self, text: str) -> str:
+        """Name of the document's stage checkpoint"""
+        digest, lazy, local, answer_version = self._document_key(text)
+        version = hashlib.sha256(repr(answer_version).encode("utf-8")).hexdigest()[:12]
+        return f"{digest}-{'lazy' if lazy else 'eager'}{'-local' if local else ''}-{version}"
+
+    def _run_llm_stage(self, checkpoint_key: str, text: str, stage: str) -> str:
+        output = self.chat_processor.process_text(text, stage)
+        self.checkpoints.save_stage(checkpoint_key, stage, output)
+        return output
+
+    def _run_geocoding_stage(self, checkpoint_key: str, locations_text: str) -> Dict[str, Any]:
+        geo_stats = GeoFetchStats()
+        processed_locations_df = self.process_locations(locations_text, geo_stats)
+
+        # Geometry stays a Shapely object until the results are serialised
+        records = processed_locations_df[['Split_location', 'Geo_Locations', 'Geometry', 'GeoJSON', 'Polygon_Pending']].to_dict(orient="records")
+        geo_stats.polygons_deferred = len(self.geo_data_methods.pending_polygon_refs(records))
+        logger.info(f"Geocoding stats: {geo_stats.report()}")
+
+        geocoding = {"records": records, "stats": geo_stats.report()}
+        self.checkpoints.save_stage(checkpoint_key, "geocoding", {
+            "records": encode_records(records, "geojson"),
+            "stats": geocoding["stats"],
+        })
+        return geocoding
+
+    @staticmethod
+    def _collect(futures: Dict[str, Any], deadline: Optional[float], outputs: Dict, status: Dict, errors: Dict) -> None:
+        """Wait for stage futures until the deadline, recording each outcome"""
+        remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+        wait(list(futures.values()), timeout=remaining)
+        for stage, future in futures.items():
+            if not future.done():
+                status[stage] = "timeout"
+                errors[stage] = "Deadline exceeded; the stage is still running and will be checkpointed"
+            elif future.exception() is not None:
+                status[stage] = "failed"
+                errors[stage] = str(future.exception())
+                logger.error(f"Stage {stage} failed: {errors[stage]}")
+            else:
+                status[stage] = "ok"
+                outputs[stage] = future.result()
+
+    def _process_text(self, text: str, deadline: Optional[float] = None) -> Optional[ProcessingResult]:
+        """
+        Run every stage, resuming completed ones from the checkpoint, and return
+        a result carrying whatever succeeded plus per-stage status and errors.
+        deadline is a time.monotonic() value shared with the coalescing key
+        """
         try:
             if not self.validate_input(text):
                 raise ValueError("Input text cannot be empty.")
 
-            # Process different aspects of the text
-            event_types = self.content_extractor.extract_event_type(self.chat_processor.process_text(text, "event_type"))
-            
-            entities = self.content_extractor.extract_entities(self.chat_processor.process_text(text, "entities"))
-            
-            names = self.content_extractor.extract_names(self.chat_processor.process_text(text, "names"))
-
-            emails = self.content_extractor.extract_emails(text)
+            checkpoint_key = self.checkpoint_key(text)
+            saved = self.checkpoints.load(checkpoint_key)
+            outputs, status, errors = {}, {}, {}
 
-            phone_num = self.chat_processor.process_text(text, "phone_numbers")
-            phone_numbers = self.content_extractor.extract_phone_numbers(phone_num)
+            # LLM stages are independent; only the ones missing from the checkpoint are re-run
+            futures = {}
+            for stage in LLM_STAGES:
+                if stage in saved:
+                    outputs[stage] = saved[stage]
+                    status[stage] = "resumed"
+                else:
+                    # Stage threads inherit the job's priority class for the rate limiter
+                    futures[stage] = self._stage_executor.submit(
+                        contextvars.copy_context().run, self._run_llm_stage, checkpoint_key, text, stage
+                    )
+            self._collect(futures, deadline, outputs, status, errors)
 
-            # Process locations
-            processed_locations_df = self.process_locations(self.chat_processor.process_text(text, "locations"))
-
-            # Convert geometry to serializable format
-            processed_locations_df['Geometry'] = processed_locations_df['Geometry'].apply(lambda x: x.wkt if hasattr(x, 'wkt') else str(x))
+            # Geocoding needs the locations answer
+            if "geocoding" in saved:
+                outputs["geocoding"] = {
+                    "records": decode_records(saved["geocoding"]["records"]),
+                    "stats": saved["geocoding"]["stats"],
+                }
+                status["geocoding"] = "resumed"
+            elif "locations" in outputs:
+                future = self._stage_executor.submit(
+                    contextvars.copy_context().run, self._run_geocoding_stage, checkpoint_key, outputs["locations"]
+                )
+                self._collect({"geocoding": future}, deadline, outputs, status, errors)
+            elif status.get("locations") == "timeout":
+                status["geocoding"] = "timeout"
+                errors["geocoding"] = "Not started, the locations stage was still running at the deadline"
+            else:
+                status["geocoding"] = "failed"
+                errors["geocoding"] = "Skipped because the locations stage did not complete"
 
-            return ProcessingResult(
-                event_types=event_types,
-                entities=entities,
-                names=names,
-                emails= emails,
-                phone= phone_numbers,
-                geojson_data=processed_locations_df[['Split_location', 'Geo_Locations', 'Geometry']].to_dict(orient="records"),
-                raw_text=text
+            result = ProcessingResult(
+                event_types=self.content_extractor.extract_event_type(outputs["event_type"]) if "event_type" in outputs else "",
+                entities=self.content_extractor.extract_entities(outputs["entities"]) if "entities" in outputs else "",
+                names=self.content_extractor.extract_names(outputs["names"]) if "names" in outputs else "",
+                emails=self.content_extractor.extract_emails(text),
+                phone=self.content_extractor.extract_phone_numbers(outputs["phone_numbers"]) if "phone_numbers" in outputs else "",
+                geojson_data=outputs["geocoding"]["records"] if "geocoding" in outputs else [],
+                raw_text=text,
+                geo_stats=outputs["geocoding"]["stats"] if "geocoding" in outputs else {},
+                status=status,
+                errors=errors,
             )
 
+            if result.complete:
+                self.checkpoints.clear(checkpoint_key)
+            else:
+                logger.warning(f"Partial result, incomplete stages: {errors}")
+            return result
+
         except Exception as e:
             logger.error(f"Error processing text: {str(e)}")
             return None
         
-def save_results(results: ProcessingResult, filename: str = "results.json"):
+def encode_records(records: List[Dict], geometry_format: str = "wkb") -> List[Dict]:
+    """Serialise geodata records, encoding Geometry and dropping the in-memory GeoJSON"""
+    encoded = []
+    for record in records:
+        record = {key: value for key, value in record.items() if key != "GeoJSON"}
+        record["Geometry"] = GeoDataMethods.encode_geometry(record.get("Geometry"), geometry_format)
+        encoded.append(record)
+    return encoded
+
+def decode_records(records: List[Dict]) -> List[Dict]:
+    """Inverse of encode_records: restore Shapely geometry and the GeoJSON passed to the map"""
+    decoded = []
+    for record in records:
+        record = dict(record)
+        geometry = GeoDataMethods.decode_geometry(record.get("Geometry"))
+        record["Geometry"] = geometry
+        record["GeoJSON"] = GeoDataMethods.encode_geometry(geometry, "geojson")
+        decoded.append(record)
+    return decoded
+
+def results_to_dict(results: ProcessingResult, geometry_format: str = "wkb") -> Dict[str, Any]:
+    """Convert results to a JSON-serialisable dict, encoding geometry as WKB, WKT or GeoJSON"""
+    output = dict(vars(results))
+    output["geojson_data"] = encode_records(results.geojson_data, geometry_format)
+    return output
+
+def save_results(results: ProcessingResult, filename: str = "results.json", geometry_format: str = "wkb"):
     """Save processing results to JSON file"""
     try:
         file_path = os.path.join(ARTIFACTS_DIR, filename)
         with open(file_path, "w") as json_file:
-            json.dump(vars(results), json_file, indent=4)
+            json.dump(results_to_dict(results, geometry_format), json_file, indent=4)
         logger.info(f"Results saved to {filename}")
     except Exception as e:
         logger.error(f"Error saving results: {str(e)}")
@@ -139,8 +366,12 @@ def cli_interface():
         
         if results:
             save_results(results)
-            create_visualization(results.geojson_data)
-            print("Analysis complete! Check results.json and map.html for output.")
+            if results.geojson_data:
+                create_visualization(results.geojson_data)
+            if results.complete:
+                print("Analysis complete! Check results.json and map.html for output.")
+            else:
+                print(f"Partial results saved; incomplete stages: {', '.join(results.errors)}. Run again to resume them.")
         else:
             print("Error processing text. Please check the logs for details.")
             
@@ -164,9 +395,14 @@ def streamlit_interface():
     if st.button("Analyze"):
         try:
             with st.spinner("Processing..."):
-                results = explorer.process_text(user_input)
+                # Interactive jobs go ahead of queued batch and fleet work
+                results = explorer.submit(user_input, priority="interactive", timeout=WEB_TIMEOUT).result()
                 
             if results:
+                if not results.complete:
+                    st.warning("Some stages did not finish, showing partial results. Analyze again to resume: "
+                               + "; ".join(f"{stage}: {error}" for stage, error in results.errors.items()))
+
                 col1, col2 = st.columns(2)
                 
                 with col1:
@@ -195,7 +431,7 @@ def streamlit_interface():
                 # Add download buttons
                 st.download_button(
                     label="Download Results (JSON)",
-                    data=json.dumps(vars(results), indent=4),
+                    data=json.dumps(results_to_dict(results), indent=4),
                     file_name="results.json",
                     mime="application/json"
                 )
@@ -0,0 +1,141 @@
+"""
+Offline comparison of the local extraction tier against the LLM path.
+
+Runs RuleBasedExtractor over labelled articles whose reference answers are
+in the LLM output format, then reports per prompt type how often the
+cascade keeps the answer locally, how well local answers agree with the
+reference (Jaccard of the parsed items), the local throughput, and the
+remote tokens, cost and time the cascade avoids.
+
+    python -m benchmarks.local_tier
+    python -m benchmarks.local_tier --threshold 0.7 --price-per-million 0.4 --remote-latency 2.5
+    python -m benchmarks.local_tier --type-threshold event_type=0.8   # measure event types locally too
+
+Remote price and latency are inputs, not measurements: nothing here touches
+the network.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Set
+
+from src.components.event import ChatProcessor, ContentExtractor
+from src.components.local_extractor import DEFAULT_THRESHOLDS, RuleBasedExtractor
+from src.components.rate_limiter import RequestScheduler
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "labelled_articles.jsonl")
+PROMPT_TYPES = ["event_type", "entities", "names", "phone_numbers", "locations"]
+
+
+def parse_items(output: str, prompt_type: str) -> Set[str]:
+    """Parse an answer the way the pipeline does and normalise it into a set of items."""
+    if prompt_type == "event_type":
+        value = ContentExtractor.extract_event_type(output)
+    elif prompt_type == "entities":
+        value = ContentExtractor.extract_entities(output)
+    elif prompt_type == "names":
+        value = ContentExtractor.extract_names(output)
+    elif prompt_type == "phone_numbers":
+        value = ContentExtractor.extract_phone_numbers(output)
+        value = "" if value.lower() in ("none", "no phone numbers found.") else value
+    else:
+        locations = ContentExtractor.extract_locations(output)
+        # Compare locations by their primary name; the country suffix is formatting
+        return {part.split(",")[0].strip().lower() for part in str(locations).strip("[]").split(";") if part.strip()}
+    return {item.strip().lower() for item in value.split(",") if item.strip()}
+
+
+def jaccard(left: Set[str], right: Set[str]) -> float:
+    if not left and not right:
+        return 1.0
+    return len(left & right) / len(left | right)
+
+
+def load_articles(path: str) -> List[Dict]:
+    with open(path) as fixture:
+        return [json.loads(line) for line in fixture if line.strip()]
+
+
+def run(
+        articles: List[Dict],
+        threshold: float,
+        repeats: int,
+        price_per_million: float,
+        remote_latency: float,
+        thresholds: Optional[Dict[str, float]] = None,
+        ) -> Dict:
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    extractor = RuleBasedExtractor()
+    prompt_builder = ChatProcessor(client=None)
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for article in articles:
+            for prompt_type in PROMPT_TYPES:
+                extractor.extract(article["text"], prompt_type)
+    elapsed = time.perf_counter() - start
+
+    report = {"documents": len(articles), "local_docs_per_second": len(articles) * repeats / elapsed, "prompt_types": {}}
+    avoided_calls = avoided_tokens = 0
+    for prompt_type in PROMPT_TYPES:
+        local_scores, kept_scores, cascade_scores, kept = [], [], [], 0
+        for article in articles:
+            extraction = extractor.extract(article["text"], prompt_type)
+            reference = parse_items(article["reference"][prompt_type], prompt_type)
+            score = jaccard(parse_items(extraction.output, prompt_type), reference)
+            local_scores.append(score)
+            if extraction.confidence >= thresholds.get(prompt_type, threshold):
+                kept += 1
+                kept_scores.append(score)
+                cascade_scores.append(score)
+                prompt = prompt_builder._get_prompt_content(article["text"], prompt_type)
+                avoided_tokens += RequestScheduler.estimate_tokens(prompt) + prompt_builder.max_tokens
+            else:
+                cascade_scores.append(1.0)  # escalated: the remote answer is the reference
+        avoided_calls += kept
+        report["prompt_types"][prompt_type] = {
+            "kept_locally": kept / len(articles),
+            "local_agreement": sum(local_scores) / len(articles),
+            "kept_agreement": sum(kept_scores) / kept if kept else None,
+            "cascade_agreement": sum(cascade_scores) / len(articles),
+        }
+
+    total_calls = len(articles) * len(PROMPT_TYPES)
+    report["remote_calls_avoided"] = f"{avoided_calls}/{total_calls}"
+    report["remote_tokens_avoided"] = avoided_tokens
+    report["estimated_cost_saved"] = round(avoided_tokens / 1_000_000 * price_per_million, 6)
+    report["estimated_remote_seconds_saved"] = round(avoided_calls * remote_latency, 2)
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare the local extraction tier with the LLM path (offline)")
+    parser.add_argument("--fixture", default=FIXTURE)
+    parser.add_argument("--threshold", type=float, default=0.8, help="Cascade confidence threshold")
+    parser.add_argument(
+        "--type-threshold", action="append", default=[], metavar="PROMPT_TYPE=VALUE",
+        help="Per prompt type threshold, e.g. event_type=0.9 (repeatable)",
+    )
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--price-per-million", type=float, default=0.5, help="Assumed remote price per million tokens")
+    parser.add_argument("--remote-latency", type=float, default=2.0, help="Assumed seconds per remote completion")
+    args = parser.parse_args(argv)
+
+    thresholds = {}
+    for override in args.type_threshold:
+        prompt_type, _, value = override.partition("=")
+        if prompt_type not in PROMPT_TYPES or not value:
+            parser.error(f"--type-threshold expects PROMPT_TYPE=VALUE with one of {PROMPT_TYPES}")
+        thresholds[prompt_type] = float(value)
+
+    report = run(
+        load_articles(args.fixture), args.threshold, args.repeats, args.price_per_million, args.remote_latency, thresholds
+    )
+    print(json.dumps(report, indent=4))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
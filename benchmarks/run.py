@@ -0,0 +1,246 @@
+"""
+Offline CPU micro-benchmarks for the local processing stages.
+
+Times ContentExtractor parsing, process_event_locations, categorize_geojson,
+geometry serialisation and map HTML generation at several input scales,
+records peak allocations, and compares against a stored baseline.
+
+    python -m benchmarks.run                      # run and compare with baseline.json
+    python -m benchmarks.run --update-baseline    # record a new baseline
+    python -m benchmarks.run --scales small --threshold 0.5
+    python -m benchmarks.run --allow-missing-baseline   # just print timings when none is recorded
+
+No network access is needed: LLM outputs and Nominatim responses come from
+the recorded fixtures, scaled up with synthetic geometry.
+"""
+import argparse
+import copy
+import json
+import math
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+from src.components.event import ContentExtractor
+from src.components.geolocation import GeoDataMethods
+from src.components.visualize import create_map_with_geojson
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCHMARK_DIR, "fixtures")
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+
+# Input size per scale: documents parsed, locations per document, vertices per polygon
+SCALES = {
+    "small": {"documents": 10, "locations": 5, "vertices": 500},
+    "medium": {"documents": 100, "locations": 50, "vertices": 5_000},
+    "large": {"documents": 1_000, "locations": 500, "vertices": 20_000},
+}
+
+
+def load_fixture(name: str):
+    with open(os.path.join(FIXTURES_DIR, name)) as fixture:
+        return json.load(fixture)
+
+
+def synthetic_polygon(vertices: int, center=(114.3, 30.6), radius: float = 0.5, parts: int = 4) -> dict:
+    """Jagged MultiPolygon GeoJSON with roughly `vertices` points, like a large admin boundary."""
+    per_part = max(vertices // parts, 4)
+    polygons = []
+    for part in range(parts):
+        cx = center[0] + part * radius * 2.5
+        ring = []
+        for i in range(per_part):
+            angle = 2 * math.pi * i / per_part
+            wobble = radius * (1 + 0.05 * math.sin(angle * 37))
+            ring.append([round(cx + wobble * math.cos(angle), 7), round(center[1] + wobble * math.sin(angle), 7)])
+        ring.append(ring[0])
+        polygons.append([ring])
+    return {"type": "MultiPolygon", "coordinates": polygons}
+
+
+def search_response(vertices: int) -> List[Dict]:
+    """Recorded Nominatim search response with its polygon swapped for a large synthetic one."""
+    response = load_fixture("nominatim_search.json")
+    response[0]["geojson"] = synthetic_polygon(vertices)
+    return response
+
+
+def geo_frame(scale: Dict[str, int]) -> pd.DataFrame:
+    """DataFrame as it looks after fetch_geojson_for_locations, ready for categorize_geojson."""
+    response = search_response(scale["vertices"])
+    rows = []
+    for i in range(scale["locations"]):
+        locations = [{
+            "Location": f"Location {i}",
+            "Latitude": float(item["lat"]),
+            "Longitude": float(item["lon"]),
+            "OSM_Ref": GeoDataMethods.osm_ref(item),
+        } for item in response]
+        rows.append({"Split_location": f"Location {i}", "Geo_Data": response, "Geo_Locations": locations})
+    return pd.DataFrame(rows)
+
+
+def stage_extract(scale: Dict[str, int]) -> Callable:
+    outputs = load_fixture("llm_outputs.json")
+    documents = [copy.deepcopy(outputs) for _ in range(scale["documents"])]
+
+    def run():
+        for doc in documents:
+            ContentExtractor.extract_event_type(doc["event_type"])
+            ContentExtractor.extract_entities(doc["entities"])
+            ContentExtractor.extract_names(doc["names"])
+            ContentExtractor.extract_phone_numbers(doc["phone_numbers"])
+            ContentExtractor.extract_locations(doc["locations"])
+            ContentExtractor.extract_emails(doc["article"])
+    return run
+
+
+def stage_process_event_locations(scale: Dict[str, int]) -> Callable:
+    names = [f"City {i}, Region {i % 7}, Country {i % 3}" for i in range(scale["locations"])]
+    frame = pd.DataFrame({"Event_Locations": ["[" + "; ".join(names) + "]"] * max(scale["documents"] // 10, 1)})
+
+    def run():
+        GeoDataMethods.process_event_locations(frame)
+    return run
+
+
+def stage_categorize_geojson(scale: Dict[str, int]) -> Callable:
+    frame = geo_frame(scale)
+
+    def run():
+        GeoDataMethods.categorize_geojson(frame.copy())
+    return run
+
+
+def _categorized_records(scale: Dict[str, int]) -> List[Dict]:
+    frame = GeoDataMethods.categorize_geojson(geo_frame(scale))
+    return frame[["Split_location", "Geo_Locations", "Geometry", "GeoJSON", "Polygon_Pending"]].to_dict(orient="records")
+
+
+def stage_serialize_wkb(scale: Dict[str, int]) -> Callable:
+    geometries = [record["Geometry"] for record in _categorized_records(scale)]
+
+    def run():
+        for geometry in geometries:
+            GeoDataMethods.encode_geometry(geometry, "wkb")
+    return run
+
+
+def stage_serialize_wkt(scale: Dict[str, int]) -> Callable:
+    geometries = [record["Geometry"] for record in _categorized_records(scale)]
+
+    def run():
+        for geometry in geometries:
+            GeoDataMethods.encode_geometry(geometry, "wkt")
+    return run
+
+
+def stage_map_html(scale: Dict[str, int]) -> Callable:
+    records = _categorized_records(scale)
+
+    def run():
+        # resolve_polygons=False keeps the stage offline; every record already has its polygon
+        map_object = create_map_with_geojson(records, resolve_polygons=False)
+        map_object.get_root().render()
+    return run
+
+
+STAGES = {
+    "extract": stage_extract,
+    "process_event_locations": stage_process_event_locations,
+    "categorize_geojson": stage_categorize_geojson,
+    "serialize_wkb": stage_serialize_wkb,
+    "serialize_wkt": stage_serialize_wkt,
+    "map_html": stage_map_html,
+}
+
+
+def measure(run: Callable, repeats: int) -> Dict[str, float]:
+    """Median wall time over `repeats` runs, then peak traced allocation in a separate run."""
+    run()  # warm up imports and caches
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"median": statistics.median(timings), "min": min(timings), "peak_bytes": peak}
+
+
+def run_benchmarks(stages: List[str], scales: List[str], repeats: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for stage in stages:
+        for scale in scales:
+            name = f"{stage}@{scale}"
+            results[name] = measure(STAGES[stage](SCALES[scale]), repeats)
+            print(f"{name:40s} median {results[name]['median'] * 1000:10.2f} ms   peak {results[name]['peak_bytes'] / 1024:10.1f} KiB")
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    """Describe every benchmark whose time or peak allocation grew by more than `threshold`."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric in ("median", "peak_bytes"):
+            if previous[metric] and current[metric] > previous[metric] * (1 + threshold):
+                change = current[metric] / previous[metric] - 1
+                regressions.append(f"{name} {metric}: {previous[metric]:.6g} -> {current[metric]:.6g} (+{change:.0%})")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline CPU benchmarks for LLM Entity Explorer")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=["small", "medium"])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown before failing")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument(
+        "--allow-missing-baseline", action="store_true", help="Exit 0 instead of 2 when there is no baseline"
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.stages, args.scales, args.repeats)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as baseline_file:
+                baseline = json.load(baseline_file)
+        baseline.update(results)
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(baseline, baseline_file, indent=4, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one.")
+        # Baselines are machine specific, so none is committed; not having one must not pass silently
+        return 0 if args.allow_missing_baseline else 2
+
+    with open(args.baseline) as baseline_file:
+        regressions = compare(results, json.load(baseline_file), args.threshold)
+    if regressions:
+        print("Regressions beyond {:.0%}:".format(args.threshold))
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,7 @@
 class PromptTemplateGenerator:
+    # Bump when a prompt's wording changes, so checkpointed answers from older prompts are not reused
+    PROMPT_VERSION = 2
+
     @staticmethod
     def generate_event_type_prompt(text):
         return f"""
@@ -150,3 +153,61 @@ class PromptTemplateGenerator:
 
         Answer:
         """
+
+    # Task, answer label and example answer for each prompt type when several articles share one prompt
+    PACKED_TASKS = {
+        "event_type": {
+            "task": "Identify the standard event types mentioned in the article. Focus on broad, generic classifications and exclude specific event titles or descriptions. Use commas to separate multiple event types. If there are none, answer \"Event Type: None\".",
+            "label": "Event Type",
+            "example": "Event Type: Earthquake, Child Labour, Deaths",
+        },
+        "entities": {
+            "task": "List all companies and organizations mentioned in the article (companies, non-profits, government agencies, international bodies, educational and research institutions, industry associations). Use full official names, add acronyms in parentheses, list each entity once and exclude geographical names. If there are none, answer \"Entities: None\".",
+            "label": "Entities",
+            "example": "Entities: World Health Organization (WHO), Apple Inc.",
+        },
+        "names": {
+            "task": "List all persons names mentioned in the article. If there are none, answer \"Entities: None\".",
+            "label": "Entities",
+            "example": "Entities: Elon Musk, John Doe",
+        },
+        "phone_numbers": {
+            "task": "List all phone numbers found in the article, including country codes and any separators. Use commas to separate multiple phone numbers. If there are none, answer \"Phone Numbers: None\".",
+            "label": "Phone Numbers",
+            "example": "Phone Numbers: (123) 456-7890, +1 234 567 8901",
+        },
+        "locations": {
+            "task": "List the geographical event locations (cities, countries, states, regions) in brackets, separating locations with semicolons and parts of one location with commas. If there are none, answer \"Event Locations: []\".",
+            "label": "Event Locations",
+            "example": "Event Locations: [New York City, USA; Paris, France]",
+        },
+    }
+
+    @staticmethod
+    def generate_packed_prompt(prompt_type, documents):
+        """
+        One prompt for several short articles. documents is a list of (doc_id, text);
+        every answer must come back on its own line prefixed with "[doc_id]".
+        """
+        task = PromptTemplateGenerator.PACKED_TASKS[prompt_type]
+        articles = "\n".join(f'<doc id="{doc_id}">\n{text}\n</doc>' for doc_id, text in documents)
+        return f"""
+        You are a Risk Analyst expert in extracting information from short articles. Each article below is wrapped in <doc id="..."> tags and must be analysed on its own.
+
+        Task (for every article):
+        {task["task"]}
+
+        Output Format:
+        - Exactly one line per article, in the order given.
+        - Start each line with the article id in square brackets, followed by "{task["label"]}:" and the answer.
+        - Do not include any explanations or additional commentary.
+
+        Example:
+        [1] {task["example"]}
+        [2] {task["example"]}
+
+        Articles:
+        {articles}
+
+        Answers:
+        """
@@ -2,13 +2,18 @@ import re
 from shapely.geometry import shape
 from typing import List, Optional, Dict, Any
 import logging
+import hashlib
 import requests
 from src.components.Prompt_template import PromptTemplateGenerator
+from src.components.single_flight import SingleFlight
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class ChatProcessor:
+    # Shared by all instances so identical prompts in flight anywhere in the process are sent once
+    inflight = SingleFlight("completion")
+
     def __init__(
             self, 
             client: Any, 
@@ -16,8 +21,10 @@ class ChatProcessor:
             llama_model_name :str  = "meta-llama/Meta-Llama-3.1-70B-Instruct",
             max_tokens: int = 256,
             temperature: float = 0.1,
+            scheduler: Optional[Any] = None,
             ):
         self.client = client
+        self.scheduler = scheduler
         self.model_name = model_name
         self.llama_model_name  = llama_model_name
         self.temperature = temperature
@@ -48,6 +55,32 @@ class ChatProcessor:
             raise ValueError(f"Unknown prompt type: {prompt_type}")
 
 
+    def _create_completion(self, model_name: str, message_content: str, max_tokens: Optional[int] = None) -> str:
+        messages = [{"role": "user", "content": message_content}]
+        max_tokens = max_tokens or self.max_tokens
+        if self.scheduler is not None:
+            # Admit the call against the model's RPM/TPM budget instead of bursting into 429s
+            response = self.scheduler.create_completion(
+                self.client,
+                model_name,
+                messages,
+                max_tokens=max_tokens,
+                temperature=self.temperature,
+            )
+        else:
+            response = self.client.chat.completions.create(
+                model=model_name,
+                messages=messages,
+                temperature=self.temperature,
+                max_tokens=max_tokens,
+            )
+        return response.choices[0].message.content
+
+    def _completion_key(self, model_name: str, message_content: str) -> tuple:
+        """Identity of a completion request, used to coalesce identical prompts in flight."""
+        prompt_hash = hashlib.sha256(message_content.encode("utf-8")).hexdigest()
+        return (model_name, self.temperature, self.max_tokens, prompt_hash)
+
     def process_text(self, text: str, prompt_type: str):
 
         try:
@@ -55,17 +88,40 @@ class ChatProcessor:
             model_name = self._get_model_for_prompt(prompt_type)
             message_content = self._get_prompt_content(text, prompt_type)  # Fixed: Changed from _get_model_for_prompt
 
-            response = self.client.chat.completions.create(
-                model=model_name,
-                messages=[{"role": "user", "content": message_content}],
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-            )
-            return response.choices[0].message.content
+            # Identical prompts already in flight (e.g. the same article submitted twice) share one completion
+            key = self._completion_key(model_name, message_content)
+            return ChatProcessor.inflight.do(key, self._create_completion, model_name, message_content)
         except Exception as e:
             logger.error(f"Error processing text: {str(e)}")
             raise
 
+    async def process_text_async(self, text: str, prompt_type: str):
+        """Async variant of process_text; coalesces with threaded callers as well."""
+        try:
+            model_name = self._get_model_for_prompt(prompt_type)
+            message_content = self._get_prompt_content(text, prompt_type)
+            key = self._completion_key(model_name, message_content)
+            return await ChatProcessor.inflight.do_async(key, self._create_completion, model_name, message_content)
+        except Exception as e:
+            logger.error(f"Error processing text: {str(e)}")
+            raise
+
+    def process_packed(self, documents: List[tuple], prompt_type: str, answer_tokens: int = 64) -> str:
+        """
+        Run one prompt type over several short documents in a single completion.
+        documents is a list of (doc_id, text); the raw answer is returned for
+        ContentExtractor.split_packed_answers.
+        """
+        try:
+            model_name = self._get_model_for_prompt(prompt_type)
+            message_content = PromptTemplateGenerator.generate_packed_prompt(prompt_type, documents)
+            # Answers grow with the pack, never give the whole pack less than a single request gets
+            max_tokens = max(self.max_tokens, answer_tokens * len(documents))
+            return self._create_completion(model_name, message_content, max_tokens)
+        except Exception as e:
+            logger.error(f"Error processing packed text: {str(e)}")
+            raise
+
 
 
 class ContentExtractor:
@@ -135,6 +191,53 @@ class ContentExtractor:
             logger.error(f"Error extracting emails: {e}")
             return "None"
         
+    @staticmethod
+    def split_packed_answers(text: str, doc_ids: List[str], prompt_type: str) -> Dict[str, str]:
+        """
+        Split a packed completion into per-document answers ("Label: ...").
+        Documents whose line is missing, duplicated or does not parse as an
+        answer of prompt_type are left out so the caller can re-run them individually.
+        """
+        try:
+            answers = {}
+            duplicates = set()
+            pattern = r"^\s*\[\s*([^\]]+?)\s*\]\s*(.*)$"
+            for doc_id, answer in re.findall(pattern, text or "", re.MULTILINE):
+                if doc_id in answers:
+                    duplicates.add(doc_id)
+                answers[doc_id] = answer.strip()
+            return {
+                doc_id: answers[doc_id]
+                for doc_id in doc_ids
+                if doc_id in answers and doc_id not in duplicates
+                and ContentExtractor.is_valid_answer(answers[doc_id], prompt_type)
+            }
+        except Exception as e:
+            logger.error(f"Error splitting packed answers: {e}")
+            return {}
+
+    @staticmethod
+    def is_valid_answer(answer: str, prompt_type: str) -> bool:
+        """
+        Whether a single answer line has the shape the extractor for prompt_type
+        expects: its label, then "None" (or nothing) when there is nothing to
+        find, otherwise a value with no second answer run into it, and for
+        locations one balanced [...] list with nothing after it.
+        """
+        label = PromptTemplateGenerator.PACKED_TASKS[prompt_type]["label"]
+        match = re.match(rf"{re.escape(label)}s?:\s*(.*)$", answer, re.IGNORECASE)
+        if not match:
+            return False
+        value = match.group(1).strip()
+        # Nothing to find is a valid answer, whether the model says "None" or leaves it blank
+        if value.rstrip(".").lower() in ("", "none"):
+            return True
+        if re.search(rf"{re.escape(label)}s?:", value, re.IGNORECASE):
+            return False
+        if prompt_type == "locations":
+            return re.fullmatch(r"\[[^\[\]]*\]\s*;?", value) is not None
+        return True
+
     @staticmethod 
     def extract_phone_numbers(text):
         try:
@@ -0,0 +1,98 @@
+"""
+Small offline gazetteer used by the local extraction tier: countries, regions
+and major cities (mapped to their country). Extend it with load_gazetteer()
+from a "Place,Country" CSV for domain specific coverage.
+"""
+from typing import Dict, Optional
+
+COUNTRIES = {
+    "Afghanistan", "Albania", "Algeria", "Angola", "Argentina", "Armenia", "Australia", "Austria",
+    "Azerbaijan", "Bahrain", "Bangladesh", "Belarus", "Belgium", "Bolivia", "Bosnia and Herzegovina",
+    "Botswana", "Brazil", "Bulgaria", "Burkina Faso", "Burundi", "Cambodia", "Cameroon", "Canada",
+    "Chad", "Chile", "China", "Colombia", "Congo", "Costa Rica", "Croatia", "Cuba", "Cyprus",
+    "Czech Republic", "Democratic Republic of the Congo", "Denmark", "Dominican Republic", "Ecuador",
+    "Egypt", "El Salvador", "Eritrea", "Estonia", "Ethiopia", "Fiji", "Finland", "France", "Gabon",
+    "Georgia", "Germany", "Ghana", "Greece", "Guatemala", "Guinea", "Haiti", "Honduras", "Hungary",
+    "Iceland", "India", "Indonesia", "Iran", "Iraq", "Ireland", "Israel", "Italy", "Ivory Coast",
+    "Jamaica", "Japan", "Jordan", "Kazakhstan", "Kenya", "Kosovo", "Kuwait", "Kyrgyzstan", "Laos",
+    "Latvia", "Lebanon", "Liberia", "Libya", "Lithuania", "Luxembourg", "Madagascar", "Malawi",
+    "Malaysia", "Mali", "Malta", "Mauritania", "Mexico", "Moldova", "Mongolia", "Montenegro",
+    "Morocco", "Mozambique", "Myanmar", "Namibia", "Nepal", "Netherlands", "New Zealand", "Nicaragua",
+    "Niger", "Nigeria", "North Korea", "North Macedonia", "Norway", "Oman", "Pakistan", "Palestine",
+    "Panama", "Papua New Guinea", "Paraguay", "Peru", "Philippines", "Poland", "Portugal", "Qatar",
+    "Romania", "Russia", "Rwanda", "Saudi Arabia", "Senegal", "Serbia", "Sierra Leone", "Singapore",
+    "Slovakia", "Slovenia", "Somalia", "South Africa", "South Korea", "South Sudan", "Spain",
+    "Sri Lanka", "Sudan", "Sweden", "Switzerland", "Syria", "Taiwan", "Tajikistan", "Tanzania",
+    "Thailand", "Togo", "Tunisia", "Turkey", "Turkmenistan", "Uganda", "Ukraine",
+    "United Arab Emirates", "United Kingdom", "United States", "Uruguay", "Uzbekistan", "Venezuela",
+    "Vietnam", "Yemen", "Zambia", "Zimbabwe", "USA", "UK", "UAE",
+}
+
+REGIONS = {
+    "Africa", "Asia", "Europe", "Middle East", "Latin America", "South America", "North America",
+    "Central America", "Caribbean", "Southeast Asia", "South Asia", "Central Asia", "East Africa",
+    "West Africa", "Sahel", "Horn of Africa", "Balkans", "Scandinavia", "Gaza", "West Bank",
+    "Kashmir", "Tibet", "Darfur", "Amazon", "Yangtze River", "Siberia", "Patagonia",
+    "California", "Texas", "Florida", "New York", "Ohio", "Louisiana", "Alaska", "Hawaii",
+    "Ontario", "Quebec", "British Columbia", "Bavaria", "Catalonia", "Hubei", "Sichuan", "Guangdong",
+    "Punjab", "Kerala", "Maharashtra", "Tamil Nadu", "Gujarat", "Bengal", "Queensland",
+    "New South Wales", "Victoria", "Anhui", "Xinjiang", "Mindanao", "Java", "Sumatra", "Borneo",
+}
+
+CITIES = {
+    "New York City": "USA", "Los Angeles": "USA", "Chicago": "USA", "Houston": "USA",
+    "Washington": "USA", "San Francisco": "USA", "Miami": "USA", "Seattle": "USA", "Boston": "USA",
+    "New Orleans": "USA", "Toronto": "Canada", "Vancouver": "Canada", "Montreal": "Canada",
+    "Ottawa": "Canada", "Mexico City": "Mexico", "Bogota": "Colombia", "Lima": "Peru",
+    "Santiago": "Chile", "Buenos Aires": "Argentina", "Sao Paulo": "Brazil", "Rio de Janeiro": "Brazil",
+    "Brasilia": "Brazil", "Caracas": "Venezuela", "Havana": "Cuba", "Port-au-Prince": "Haiti",
+    "London": "United Kingdom", "Manchester": "United Kingdom", "Edinburgh": "United Kingdom",
+    "Dublin": "Ireland", "Paris": "France", "Marseille": "France", "Lyon": "France",
+    "Berlin": "Germany", "Munich": "Germany", "Hamburg": "Germany", "Frankfurt": "Germany",
+    "Madrid": "Spain", "Barcelona": "Spain", "Lisbon": "Portugal", "Rome": "Italy", "Milan": "Italy",
+    "Naples": "Italy", "Amsterdam": "Netherlands", "Brussels": "Belgium", "Geneva": "Switzerland",
+    "Zurich": "Switzerland", "Vienna": "Austria", "Prague": "Czech Republic", "Warsaw": "Poland",
+    "Budapest": "Hungary", "Bucharest": "Romania", "Athens": "Greece", "Istanbul": "Turkey",
+    "Ankara": "Turkey", "Kyiv": "Ukraine", "Kharkiv": "Ukraine", "Odesa": "Ukraine",
+    "Moscow": "Russia", "Saint Petersburg": "Russia", "Stockholm": "Sweden", "Oslo": "Norway",
+    "Copenhagen": "Denmark", "Helsinki": "Finland", "Cairo": "Egypt", "Alexandria": "Egypt",
+    "Lagos": "Nigeria", "Abuja": "Nigeria", "Accra": "Ghana", "Nairobi": "Kenya", "Mombasa": "Kenya",
+    "Addis Ababa": "Ethiopia", "Khartoum": "Sudan", "Kinshasa": "Democratic Republic of the Congo",
+    "Johannesburg": "South Africa", "Cape Town": "South Africa", "Durban": "South Africa",
+    "Dar es Salaam": "Tanzania", "Kampala": "Uganda", "Kigali": "Rwanda", "Mogadishu": "Somalia",
+    "Dakar": "Senegal", "Casablanca": "Morocco", "Tunis": "Tunisia", "Tripoli": "Libya",
+    "Algiers": "Algeria", "Harare": "Zimbabwe", "Lusaka": "Zambia", "Maputo": "Mozambique",
+    "Baghdad": "Iraq", "Mosul": "Iraq", "Tehran": "Iran", "Damascus": "Syria", "Aleppo": "Syria",
+    "Beirut": "Lebanon", "Amman": "Jordan", "Jerusalem": "Israel", "Tel Aviv": "Israel",
+    "Riyadh": "Saudi Arabia", "Jeddah": "Saudi Arabia", "Dubai": "United Arab Emirates",
+    "Abu Dhabi": "United Arab Emirates", "Doha": "Qatar", "Sanaa": "Yemen", "Kabul": "Afghanistan",
+    "Karachi": "Pakistan", "Lahore": "Pakistan", "Islamabad": "Pakistan", "New Delhi": "India",
+    "Delhi": "India", "Mumbai": "India", "Kolkata": "India", "Chennai": "India", "Bangalore": "India",
+    "Hyderabad": "India", "Dhaka": "Bangladesh", "Chittagong": "Bangladesh", "Kathmandu": "Nepal",
+    "Colombo": "Sri Lanka", "Beijing": "China", "Shanghai": "China", "Wuhan": "China",
+    "Chongqing": "China", "Guangzhou": "China", "Shenzhen": "China", "Chengdu": "China",
+    "Yichang": "China", "Hong Kong": "China", "Taipei": "Taiwan", "Tokyo": "Japan", "Osaka": "Japan",
+    "Seoul": "South Korea", "Pyongyang": "North Korea", "Bangkok": "Thailand", "Hanoi": "Vietnam",
+    "Ho Chi Minh City": "Vietnam", "Phnom Penh": "Cambodia", "Yangon": "Myanmar", "Manila": "Philippines",
+    "Jakarta": "Indonesia", "Kuala Lumpur": "Malaysia", "Sydney": "Australia", "Melbourne": "Australia",
+    "Brisbane": "Australia", "Perth": "Australia", "Auckland": "New Zealand", "Wellington": "New Zealand",
+}
+
+
+def build_index(countries=COUNTRIES, regions=REGIONS, cities=CITIES) -> Dict[str, Optional[str]]:
+    """Lower-cased place name -> country for cities, None for countries and regions."""
+    index: Dict[str, Optional[str]] = {name.lower(): None for name in countries | regions}
+    index.update({name.lower(): country for name, country in cities.items()})
+    return index
+
+
+def load_gazetteer(path: str) -> Dict[str, Optional[str]]:
+    """Extend the built-in gazetteer with a CSV of "Place,Country" lines (country may be empty)."""
+    index = build_index()
+    with open(path) as gazetteer_file:
+        for line in gazetteer_file:
+            if not line.strip() or line.startswith("#"):
+                continue
+            place, _, country = line.strip().partition(",")
+            index[place.strip().lower()] = country.strip() or None
+    return index
@@ -5,12 +5,86 @@ import numpy as np
 import requests
 from shapely.geometry import shape
 from shapely.geometry import Point
+from shapely.geometry import mapping
+from shapely import wkb, wkt
 import json
+import time
+import base64
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
 from datetime import datetime
+from typing import Dict, List, Optional
+from src.components.single_flight import SingleFlight
+
+NOMINATIM_SEARCH_URL = "https://nominatim.openstreetmap.org/search.php"
+NOMINATIM_LOOKUP_URL = "https://nominatim.openstreetmap.org/lookup"
+NOMINATIM_HEADERS = {
+    "User-Agent": "geojson_converter/1.0 (sandeep@intuitive-ai.com)"
+}
+
+# Serialisations supported for the Geometry field when results leave the process
+GEOMETRY_FORMATS = ("wkb", "wkt", "geojson")
+
+# Nominatim reports osm_type as a word, the lookup endpoint wants a one letter prefix
+OSM_TYPE_PREFIX = {"node": "N", "way": "W", "relation": "R"}
+
+# Nominatim's /lookup accepts at most 50 osm_ids per request
+NOMINATIM_LOOKUP_BATCH = 50
+# Polygons kept in memory, least recently used are dropped first
+POLYGON_CACHE_SIZE = 512
+
+# Assumed cost of one polygon lookup until this process has made a real one
+DEFAULT_POLYGON_BYTES = 25000
+DEFAULT_POLYGON_LATENCY = 0.4
+
+
+@dataclass
+class GeoFetchStats:
+    """Bytes and latency spent on Nominatim calls for a single document."""
+    point_requests: int = 0
+    point_bytes: int = 0
+    point_latency: float = 0.0
+    polygon_requests: int = 0
+    polygon_bytes: int = 0
+    polygon_latency: float = 0.0
+    polygon_cache_hits: int = 0
+    polygons_deferred: int = 0
+
+    def record_point(self, num_bytes: int, latency: float) -> None:
+        self.point_requests += 1
+        self.point_bytes += num_bytes
+        self.point_latency += latency
+
+    def record_polygon(self, num_bytes: int, latency: float) -> None:
+        self.polygon_requests += 1
+        self.polygon_bytes += num_bytes
+        self.polygon_latency += latency
+
+    def report(self) -> Dict:
+        """
+        Summarise the transfer, including the estimated bytes and seconds saved
+        by not asking for polygons that were never drawn.
+        """
+        bytes_per_polygon, latency_per_polygon = GeoDataMethods.polygon_profile()
+        report = asdict(self)
+        report["bytes_transferred"] = self.point_bytes + self.polygon_bytes
+        report["latency"] = round(self.point_latency + self.polygon_latency, 3)
+        report["estimated_bytes_saved"] = int(self.polygons_deferred * bytes_per_polygon)
+        report["estimated_latency_saved"] = round(self.polygons_deferred * latency_per_polygon, 3)
+        return report
 
 class GeoDataMethods:
     """Methods for processing geographical data."""
 
+    # Polygon GeoJSON fetched on demand, keyed by OSM reference (e.g. "R62422")
+    _polygon_cache: "OrderedDict[str, Optional[dict]]" = OrderedDict()
+    _polygon_lock = threading.Lock()
+    # Running totals of polygon lookups, used to estimate what lazy fetching saves
+    _polygon_totals = {"refs": 0, "bytes": 0, "latency": 0.0}
+    # Concurrent searches for the same location share one Nominatim request
+    inflight = SingleFlight("geocode")
+
     @staticmethod
     def process_event_locations(df_location: pd.DataFrame, location_column: str = 'Event_Locations') -> pd.DataFrame:
         # Step 1: Replace NaN with an empty list and split locations in one go
@@ -30,13 +104,36 @@ class GeoDataMethods:
     
     # GeoAPI function to fetch GeoJSON data
     @staticmethod
-    def geoapi(location: str) -> list:
-        url = f"https://nominatim.openstreetmap.org/search.php?q={location}&accept-language=en&polygon_geojson=1&limit=2&format=jsonv2"
-        headers = {
-            "User-Agent": "geojson_converter/1.0 (sandeep@intuitive-ai.com)"
+    def geoapi(location: str, polygon_geojson: bool = False, stats: Optional[GeoFetchStats] = None) -> list:
+        """
+        Search Nominatim for a location. By default only point results
+        (place_id, lat/lon, boundingbox, osm ids) are requested; pass
+        polygon_geojson=True to get the full geometry in the same call.
+        Callers that join an identical search already in flight share its
+        response and record nothing in their stats.
+        """
+        return GeoDataMethods.inflight.do(
+            (location, polygon_geojson), GeoDataMethods._search, location, polygon_geojson, stats
+        )
+
+    @staticmethod
+    def _search(location: str, polygon_geojson: bool, stats: Optional[GeoFetchStats]) -> list:
+        params = {
+            "q": location,
+            "accept-language": "en",
+            "polygon_geojson": 1 if polygon_geojson else 0,
+            "limit": 2,
+            "format": "jsonv2",
         }
         try:
-            response = requests.get(url, headers=headers, timeout=10)
+            start = time.perf_counter()
+            response = requests.get(NOMINATIM_SEARCH_URL, params=params, headers=NOMINATIM_HEADERS, timeout=10)
+            latency = time.perf_counter() - start
+            if stats is not None:
+                if polygon_geojson:
+                    stats.record_polygon(len(response.content), latency)
+                else:
+                    stats.record_point(len(response.content), latency)
             if response.status_code == 200:
                 data = response.json()
                 return data
@@ -47,19 +144,134 @@ class GeoDataMethods:
             print(f"Request failed for {location}: {e}")
             return None
 
+    @staticmethod
+    def osm_ref(item: dict) -> Optional[str]:
+        """Build the lookup reference ("N123", "W456", "R789") for a search result."""
+        prefix = OSM_TYPE_PREFIX.get(item.get('osm_type', ''))
+        if prefix and item.get('osm_id') is not None:
+            return f"{prefix}{item['osm_id']}"
+        return None
+
+    @staticmethod
+    def fetch_polygons(osm_refs: List[str], stats: Optional[GeoFetchStats] = None) -> Dict[str, Optional[dict]]:
+        """
+        Fetch polygon GeoJSON for OSM references, using the cache where possible.
+        Uncached references are resolved with Nominatim lookup calls of up to
+        NOMINATIM_LOOKUP_BATCH ids each. References in a lookup that failed are
+        left out of the result (and the cache) so they can be retried later.
+        """
+        with GeoDataMethods._polygon_lock:
+            cache = GeoDataMethods._polygon_cache
+            cached = {ref: cache[ref] for ref in osm_refs if ref in cache}
+            for ref in cached:
+                cache.move_to_end(ref)
+        missing = [ref for ref in dict.fromkeys(osm_refs) if ref not in cached]
+        if stats is not None:
+            stats.polygon_cache_hits += len(cached)
+
+        for offset in range(0, len(missing), NOMINATIM_LOOKUP_BATCH):
+            cached.update(GeoDataMethods._lookup(missing[offset:offset + NOMINATIM_LOOKUP_BATCH], stats))
+        return cached
+
+    @staticmethod
+    def _lookup(osm_refs: List[str], stats: Optional[GeoFetchStats]) -> Dict[str, Optional[dict]]:
+        """One lookup call; every ref is answered (None when OSM has no polygon), or none on failure."""
+        params = {
+            "osm_ids": ",".join(osm_refs),
+            "polygon_geojson": 1,
+            "format": "jsonv2",
+        }
+        fetched = {}
+        try:
+            start = time.perf_counter()
+            response = requests.get(NOMINATIM_LOOKUP_URL, params=params, headers=NOMINATIM_HEADERS, timeout=10)
+            latency = time.perf_counter() - start
+            if stats is not None:
+                stats.record_polygon(len(response.content), latency)
+            if response.status_code != 200:
+                print(f"Error fetching polygons for {osm_refs}: {response.status_code}")
+                return {}
+            for item in response.json():
+                ref = GeoDataMethods.osm_ref(item)
+                if ref:
+                    fetched[ref] = item.get('geojson')
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Polygon lookup failed for {osm_refs}: {e}")
+            return {}
+
+        polygons = {ref: fetched.get(ref) for ref in osm_refs}
+        with GeoDataMethods._polygon_lock:
+            cache = GeoDataMethods._polygon_cache
+            cache.update(polygons)
+            while len(cache) > POLYGON_CACHE_SIZE:
+                cache.popitem(last=False)
+            totals = GeoDataMethods._polygon_totals
+            totals["refs"] += len(osm_refs)
+            totals["bytes"] += len(response.content)
+            totals["latency"] += latency
+        return polygons
+
+    @staticmethod
+    def polygon_profile(default: tuple = (DEFAULT_POLYGON_BYTES, DEFAULT_POLYGON_LATENCY)) -> tuple:
+        """
+        Average (bytes, seconds) a polygon lookup has cost so far in this
+        process, or the given default before any lookup has been made.
+        """
+        with GeoDataMethods._polygon_lock:
+            totals = dict(GeoDataMethods._polygon_totals)
+        if not totals["refs"]:
+            return default
+        return totals["bytes"] / totals["refs"], totals["latency"] / totals["refs"]
+
+    @staticmethod
+    def pending_polygon_refs(records: List[Dict]) -> List[str]:
+        """OSM references whose polygons have not been fetched yet."""
+        refs = [loc['OSM_Ref'] for record in records if record.get('Polygon_Pending')
+                for loc in record.get('Geo_Locations', []) if loc.get('OSM_Ref')]
+        return list(dict.fromkeys(refs))
+
+    @staticmethod
+    def resolve_polygons(records: List[Dict], stats: Optional[GeoFetchStats] = None) -> List[Dict]:
+        """
+        Upgrade records whose geometry is still a placeholder point to the
+        polygon of the first matching OSM result, mirroring categorize_geojson.
+        Records whose lookup failed stay pending so a later call can retry them.
+        """
+        pending = [record for record in records if record.get('Polygon_Pending')]
+        refs = GeoDataMethods.pending_polygon_refs(pending)
+        if not refs:
+            return records
+
+        polygons = GeoDataMethods.fetch_polygons(refs, stats)
+        if stats is not None:
+            stats.polygons_deferred = max(0, stats.polygons_deferred - len(polygons))
+        for record in pending:
+            record_refs = [loc.get('OSM_Ref') for loc in record.get('Geo_Locations', []) if loc.get('OSM_Ref')]
+            if any(ref not in polygons for ref in record_refs):
+                continue
+            for loc in record.get('Geo_Locations', []):
+                geojson = polygons.get(loc.get('OSM_Ref')) or {}
+                if geojson.get('type') in ['MultiPolygon', 'Polygon']:
+                    record['Geometry'] = shape(geojson)
+                    record['GeoJSON'] = geojson
+                    break
+            record['Polygon_Pending'] = False
+        return records
+
     # Fetch GeoJSON data for each location
     @staticmethod
-    def fetch_geojson_for_locations(location: str) -> tuple:
+    def fetch_geojson_for_locations(location: str, lazy: bool = True, stats: Optional[GeoFetchStats] = None) -> tuple:
         geojson_data = []
         geojson_location = []
-        data = GeoDataMethods.geoapi(location)
+        data = GeoDataMethods.geoapi(location, polygon_geojson=not lazy, stats=stats)
         if data:
             for item in data:
                 if 'lat' in item and 'lon' in item:
                     geojson_location.append({
                         'Location': location,
                         'Latitude': float(item['lat']),
-                        'Longitude': float(item['lon'])
+                        'Longitude': float(item['lon']),
+                        'OSM_Ref': GeoDataMethods.osm_ref(item),
                     })
             geojson_data = data  # Assign the entire response to geojson_data
         return geojson_data, geojson_location
@@ -69,6 +281,8 @@ class GeoDataMethods:
         # Initialize the 'Geometry' column if it doesn't already exist
         if 'Geometry' not in df_location.columns:
             df_location['Geometry'] = None
+        df_location['GeoJSON'] = None
+        df_location['Polygon_Pending'] = False
 
         for index, row in df_location.iterrows():
             items = row['Geo_Data']
@@ -78,21 +292,66 @@ class GeoDataMethods:
 
             # Initialize a variable to hold the shape to be assigned
             selected_shape = None
+            selected_geojson = None
+            polygon_pending = False
 
             for item in items:
-                geojson = item.get('geojson', {})
+                geojson = item.get('geojson')
+                if geojson is None:
+                    # Point-only search result: stand in with its centre until the polygon is requested
+                    if selected_shape is None and 'lat' in item and 'lon' in item:
+                        selected_shape = Point(float(item['lon']), float(item['lat']))
+                        selected_geojson = mapping(selected_shape)
+                    polygon_pending = polygon_pending or GeoDataMethods.osm_ref(item) is not None
+                    continue
                 geojson_type = geojson.get('type', '')
 
                 # Determine which shape to use
                 if geojson_type in ['MultiPolygon', 'Polygon']:
                     selected_shape = shape(geojson)
+                    selected_geojson = geojson
                     # Break loop if we found a MultiPolygon or Polygon
                     break
                 elif geojson_type == 'Point':
                     # Assign Point if no other shape has been selected
                     if selected_shape is None:
                         selected_shape = shape(geojson)
+                        selected_geojson = geojson
 
             # Assign the selected shape to the 'Geometry' column
+            # Keep the source GeoJSON so the renderer does not have to rebuild it from the shape
             df_location.at[index, 'Geometry'] = selected_shape
+            df_location.at[index, 'GeoJSON'] = selected_geojson
+            df_location.at[index, 'Polygon_Pending'] = polygon_pending
         return df_location
+
+    @staticmethod
+    def encode_geometry(geometry, geometry_format: str = "wkb"):
+        """
+        Serialise a Shapely geometry for JSON output. "wkb" gives base64 encoded
+        well-known binary, "wkt" the legacy text form and "geojson" a mapping.
+        """
+        if geometry is None:
+            return None
+        if geometry_format == "wkb":
+            return base64.b64encode(wkb.dumps(geometry)).decode("ascii")
+        elif geometry_format == "wkt":
+            return geometry.wkt
+        elif geometry_format == "geojson":
+            return mapping(geometry)
+        else:
+            raise ValueError(f"Unknown geometry format: {geometry_format}")
+
+    @staticmethod
+    def decode_geometry(value):
+        """Turn any geometry produced by encode_geometry (or raw WKB bytes) back into Shapely."""
+        if value is None or hasattr(value, 'geom_type'):
+            return value
+        if isinstance(value, dict):
+            return shape(value)
+        if isinstance(value, (bytes, bytearray)):
+            return wkb.loads(bytes(value))
+        # Base64 WKB always starts with the byte order marker (0x00 or 0x01), no WKT keyword does
+        if value[:2] in ("AA", "AQ"):
+            return wkb.loads(base64.b64decode(value))
+        return wkt.loads(value)
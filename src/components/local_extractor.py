@@ -0,0 +1,357 @@
+import re
+import logging
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.components.gazetteer import build_index
+
+logger = logging.getLogger(__name__)
+
+ORG_SUFFIXES = {
+    "Inc", "Inc.", "Corp", "Corp.", "Corporation", "Company", "Co", "Co.", "Ltd", "Ltd.", "LLC", "PLC",
+    "Group", "Holdings", "Organization", "Organisation", "Agency", "Association", "Institute",
+    "University", "College", "Bank", "Fund", "Council", "Committee", "Commission", "Authority",
+    "Society", "Foundation", "Federation", "Union", "Movement", "Program", "Programme", "Ministry",
+    "Department", "Office", "Service", "Services", "Police", "Army", "Forces", "Court", "Party",
+    "Network", "Alliance", "Coalition", "Centre", "Center", "Industries", "Technologies", "Nations",
+    "Cross", "Crescent",
+}
+ORG_PREFIXES = {"Ministry", "Department", "University", "Bank", "Institute", "Office", "Red", "World", "International"}
+PERSON_TITLES = {
+    "Mr", "Mrs", "Ms", "Dr", "Prof", "President", "Prime", "Minister", "Secretary", "Governor", "Mayor",
+    "Senator", "General", "Chief", "Director", "CEO", "Chairman", "Spokesperson", "Spokesman", "Judge",
+    "King", "Queen", "Sir", "Lady", "Captain", "Colonel", "Commissioner", "Ambassador",
+}
+SPEECH_VERBS = r"(?:said|says|told|added|stated|announced|warned|confirmed|explained)"
+# Capitalised words that start sentences or headlines without naming anything
+LEADING_STOPWORDS = {
+    "The", "A", "An", "In", "On", "At", "By", "For", "From", "With", "After", "Before", "During",
+    "According", "As", "But", "And", "Or", "It", "This", "That", "These", "Those", "Its", "Their",
+    "He", "She", "They", "We", "Officials", "Authorities", "More", "Some", "Many", "Severe", "Heavy",
+}
+# Days and months end a phrase rather than extend it ("Lagos, Nigeria on Monday")
+CALENDAR_WORDS = {
+    "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday",
+    "January", "February", "March", "April", "May", "June", "July", "August", "September",
+    "October", "November", "December",
+}
+EVENT_LEXICON = {
+    "Earthquake": r"earthquake|quake|tremor|seismic",
+    "Flooding": r"flood(?:s|ing|ed)?|inundat\w*",
+    "Storm": r"storm|hurricane|cyclone|typhoon|tornado",
+    "Wildfire": r"wildfire|bushfire|forest fire",
+    "Fire": r"\bfire\b|blaze|burn(?:ed|ing)",
+    "Explosion": r"explosion|blast|exploded",
+    "Drought": r"drought",
+    "Deaths": r"\bdead\b|deaths?|killed|fatalit\w*|died",
+    "Injuries": r"injur\w+|wounded",
+    "Displacement": r"displac\w+|evacuat\w+|homeless",
+    "Protest": r"protest\w*|demonstrat\w+|rall(?:y|ies)",
+    "Strike": r"\bstrikes?\b|walkout",
+    "Armed Conflict": r"airstrike|shelling|clashes|militant\w*|insurgen\w+|armed conflict",
+    "Terrorism": r"terror\w*|suicide bomb\w*",
+    "Child Labour": r"child labou?r",
+    "Forced Labour": r"forced labou?r|modern slavery|human trafficking",
+    "Corruption": r"corruption|brib\w+|embezzl\w+",
+    "Fraud": r"fraud\w*",
+    "Data Breach": r"data breach|cyberattack|ransomware|hack(?:ed|ers?)",
+    "Pollution": r"pollut\w+|oil spill|toxic|contaminat\w+",
+    "Access to Water": r"access to (?:clean )?water|water shortage|drinking water",
+    "Disease Outbreak": r"outbreak|epidemic|pandemic|cholera|ebola",
+    "Land Rights": r"land rights|land grab|eviction",
+    "Labour Rights": r"wage theft|unpaid wages|workers'? rights|unsafe working",
+}
+# Lower-case words allowed inside a capitalised phrase ("Ministry of Health", "Hubei and Anhui")
+CONNECTORS = {"of", "for", "and", "the", "de", "on", "du", "la", "&"}
+# No dots inside words, so a phrase never runs across a sentence boundary ("Florida. FEMA")
+CAPITALISED_PHRASE = re.compile(
+    r"\b[A-Z][\w'&-]*(?:\s+(?:(?:of|for|and|the|de|on|du|la)\s+)?(?:[A-Z][\w'&-]*|&))*"
+)
+# Per prompt type overrides of the cascade threshold. Event types are open-ended labels that the
+# lexicon only approximates (half agreement on the labelled benchmark even when confident), so
+# they always go to the remote model unless a caller sets a threshold for them.
+DEFAULT_THRESHOLDS = {"event_type": float("inf")}
+# Dates a phone pattern would otherwise accept: 2023-10-19, 2023/10/19, 12.10.2023, 19-10-2023
+DATE = re.compile(r"\d{4}[-/.]\d{1,2}[-/.]\d{1,2}|\d{1,2}[-/.]\d{1,2}[-/.]\d{4}")
+PHONE_NUMBER = re.compile(r"(?:\+\d{1,3}[\s.-]?)?(?:\(\d{2,4}\)[\s.-]?)?\d{2,4}(?:[\s.-]\d{2,4}){1,4}")
+
+
+@dataclass
+class LocalExtraction:
+    """A local answer in the same format as the LLM output, with how much it can be trusted."""
+    output: str
+    confidence: float
+    reason: str = ""
+
+
+class LocalExtractor(ABC):
+    """
+    Interface for local (CPU, offline) extraction backends. Implementations
+    return answers in the same format as the remote prompts ("Entities: ...",
+    "Event Locations: [...]", ...), so ContentExtractor parses either one.
+    """
+
+    @abstractmethod
+    def extract(self, text: str, prompt_type: str) -> LocalExtraction:
+        """Answer one prompt type for the text, with a confidence in [0, 1]."""
+
+    def process_text(self, text: str, prompt_type: str) -> str:
+        return self.extract(text, prompt_type).output
+
+
+class RuleBasedExtractor(LocalExtractor):
+    """
+    Rule and gazetteer based extractor. Confidence drops when capitalised
+    phrases cannot be explained (not a known place, organisation or cued
+    person), or when a candidate conflicts with the gazetteer.
+    """
+
+    def __init__(self, gazetteer: Optional[Dict[str, Optional[str]]] = None):
+        self.gazetteer = gazetteer or build_index()
+        self._longest_place = max(len(name.split()) for name in self.gazetteer)
+
+    def extract(self, text: str, prompt_type: str) -> LocalExtraction:
+        if prompt_type == "event_type":
+            return self._event_types(text)
+        elif prompt_type == "entities":
+            return self._entities(text)
+        elif prompt_type == "names":
+            return self._names(text)
+        elif prompt_type == "locations":
+            return self._locations(text)
+        elif prompt_type == "phone_numbers":
+            return self._phone_numbers(text)
+        else:
+            raise ValueError(f"Unknown prompt type: {prompt_type}")
+
+    def _phrases(self, text: str) -> List[Tuple[str, int, int]]:
+        """Capitalised phrases with sentence-initial filler words stripped."""
+        phrases = []
+        for match in CAPITALISED_PHRASE.finditer(text):
+            words = match.group(0).split()
+            start = match.start()
+            end = match.end()
+            while words and words[0] in LEADING_STOPWORDS:
+                start = text.find(words[1], start) if len(words) > 1 else end
+                words = words[1:]
+            while words and (words[-1] in CALENDAR_WORDS or words[-1] in CONNECTORS):
+                end = text.rfind(words[-1], start, end)
+                words = words[:-1]
+            if words:
+                phrases.append((" ".join(words), start, end))
+        return phrases
+
+    def _places_in(self, phrase: str) -> List[str]:
+        """Gazetteer names inside a phrase, longest match first, left to right."""
+        words = phrase.split()
+        places, i = [], 0
+        while i < len(words):
+            for size in range(min(self._longest_place, len(words) - i), 0, -1):
+                candidate = " ".join(words[i:i + size])
+                if candidate.lower() in self.gazetteer:
+                    places.append(candidate)
+                    i += size
+                    break
+            else:
+                i += 1
+        return places
+
+    def _classify(self, text: str) -> Dict[str, List[str]]:
+        """Sort capitalised phrases into places, organisations, people and unexplained ones."""
+        classes = {"places": [], "orgs": [], "people": [], "uncued_people": [], "unknown": [], "conflicts": []}
+        acronyms = set(re.findall(r"\(([A-Z]{2,})\)", text))
+        for phrase, start, end in self._phrases(text):
+            words = phrase.split()
+            before = text[max(0, start - 25):start]
+            after = text[end:end + 20]
+            is_org = words[-1] in ORG_SUFFIXES or words[0] in ORG_PREFIXES or re.match(r"\s*\([A-Z]{2,}\)", after)
+            places = self._places_in(phrase)
+            named_words = [word for word in words if word not in CONNECTORS]
+
+            if is_org:
+                acronym = re.match(r"\s*\(([A-Z]{2,})\)", after)
+                classes["orgs"].append(f"{phrase} ({acronym.group(1)})" if acronym else phrase)
+            elif places and " ".join(places).split() == named_words:
+                classes["places"].extend(places)
+            elif phrase in acronyms:
+                continue  # already reported with its organisation
+            elif words[0] in PERSON_TITLES and len(words) >= 2:
+                classes["people"].append(" ".join(word for word in words if word not in PERSON_TITLES))
+            elif 2 <= len(words) <= 3 and all(word.isalpha() for word in words):
+                cued = (
+                    re.search(r"\b(?:%s)\.?\s*$" % "|".join(PERSON_TITLES), before)
+                    or re.match(r",?\s*" + SPEECH_VERBS, after)
+                    or re.search(SPEECH_VERBS + r"\s*$", before)
+                )
+                if places:
+                    # A "person" that contains a known place: the gazetteer disagrees, let the LLM decide
+                    classes["conflicts"].append(phrase)
+                elif cued:
+                    classes["people"].append(phrase)
+                else:
+                    classes["uncued_people"].append(phrase)
+            else:
+                if places:
+                    classes["places"].extend(places)
+                if len(words) > 1 or (words[0].isupper() and len(words[0]) > 1):
+                    classes["unknown"].append(phrase)
+        return {key: list(dict.fromkeys(values)) for key, values in classes.items()}
+
+    @staticmethod
+    def _confidence(unexplained: int, conflicts: int) -> float:
+        if conflicts:
+            return 0.3
+        return max(0.3, 0.9 - 0.15 * unexplained)
+
+    def _event_types(self, text: str) -> LocalExtraction:
+        hits = {label: len(re.findall(pattern, text, re.IGNORECASE)) for label, pattern in EVENT_LEXICON.items()}
+        found = [label for label, count in hits.items() if count]
+        if not found:
+            return LocalExtraction("Event Type: ", 0.0, "no event keywords")
+        # Generic labels are easy to miss with keywords alone; trust only well supported answers
+        confidence = 0.85 if sum(hits.values()) >= 2 * len(found) else 0.6
+        return LocalExtraction(f"Event Type: {', '.join(found)}", confidence)
+
+    def _entities(self, text: str) -> LocalExtraction:
+        classes = self._classify(text)
+        unexplained = len(classes["unknown"]) + len(classes["uncued_people"])
+        return LocalExtraction(
+            f"Entities: {', '.join(classes['orgs'])}",
+            self._confidence(unexplained, len(classes["conflicts"])),
+            f"unexplained: {classes['unknown'] + classes['uncued_people']}" if unexplained else "",
+        )
+
+    def _names(self, text: str) -> LocalExtraction:
+        classes = self._classify(text)
+        unexplained = len(classes["unknown"]) + len(classes["uncued_people"])
+        return LocalExtraction(
+            f"Entities: {', '.join(classes['people'])}",
+            self._confidence(unexplained, len(classes["conflicts"])),
+            f"uncued: {classes['uncued_people']}" if classes["uncued_people"] else "",
+        )
+
+    def _locations(self, text: str) -> LocalExtraction:
+        classes = self._classify(text)
+        places = classes["places"]
+        city_countries = {self.gazetteer[place.lower()] for place in places if self.gazetteer[place.lower()]}
+        locations = []
+        for place in places:
+            country = self.gazetteer[place.lower()]
+            if country:
+                locations.append(f"{place}, {country}")
+            elif place not in city_countries:
+                locations.append(place)
+        # Capitalised words after a locative preposition that the gazetteer does not know
+        orgs = " ".join(classes["orgs"])
+        unknown_places = [
+            match.group(1)
+            for match in re.finditer(r"\b(?:in|at|near|across|throughout|outside)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)", text)
+            if not self._places_in(match.group(1))
+            and match.group(1).split()[0] not in LEADING_STOPWORDS
+            and match.group(1) not in orgs
+        ]
+        # "Goma, Congo": an unknown name qualified by a known place is a place we would drop
+        unknown_places += [
+            match.group(1)
+            for match in re.finditer(r"\b([A-Z][a-z]+),\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)", text)
+            if match.group(1).lower() not in self.gazetteer
+            and match.group(1) not in LEADING_STOPWORDS | CALENDAR_WORDS
+            and self._places_in(match.group(2))
+        ]
+        # Phrases mixing a known place with unknown words ("Bayelsa and Lagos") may hide places too,
+        # unless they are acronyms or name an organisation ("National Commission on Human Rights")
+        doubtful = list(dict.fromkeys(unknown_places + [
+            phrase for phrase in classes["unknown"] + classes["conflicts"]
+            if not phrase.isupper() and not ORG_SUFFIXES & set(phrase.split())
+        ]))
+        confidence = 0.9 if places else 0.7
+        if doubtful:
+            confidence = 0.3
+        return LocalExtraction(
+            f"Event Locations: [{'; '.join(locations)}]",
+            confidence,
+            f"not in gazetteer: {doubtful}" if doubtful else "",
+        )
+
+    def _phone_numbers(self, text: str) -> LocalExtraction:
+        numbers = []
+        text = DATE.sub(" ", text)
+        for match in PHONE_NUMBER.finditer(text):
+            number = match.group(0).strip()
+            digits = re.sub(r"\D", "", number)
+            # Skip years and counts such as "40,000" that only look like numbers (dates are removed above)
+            if 7 <= len(digits) <= 15:
+                numbers.append(number)
+        numbers = list(dict.fromkeys(numbers))
+        covered = "".join(re.sub(r"\D", "", number) for number in numbers)
+        stray = [run for run in re.findall(r"\d{7,}", re.sub(r"[\s().+-]", "", text)) if run not in covered]
+        confidence = 0.5 if stray else 0.9
+        output = f"Phone Numbers: {', '.join(numbers)}" if numbers else "Phone Numbers: None"
+        return LocalExtraction(output, confidence, f"unmatched digits: {stray}" if stray else "")
+
+
+class CascadeProcessor:
+    """
+    Drop-in replacement for ChatProcessor that answers from the local tier
+    when it is confident and escalates to the remote LLM otherwise. threshold
+    applies to every prompt type without an entry in thresholds, which is
+    layered over DEFAULT_THRESHOLDS.
+    """
+
+    def __init__(
+            self,
+            local: LocalExtractor,
+            remote: Any,
+            threshold: float = 0.8,
+            thresholds: Optional[Dict[str, float]] = None,
+            ):
+        self.local = local
+        self.remote = remote
+        self.threshold = threshold
+        self.thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, prompt_type: str, outcome: str) -> None:
+        with self._lock:
+            counts = self._metrics.setdefault(prompt_type, {"local": 0, "escalated": 0})
+            counts[outcome] += 1
+
+    def threshold_for(self, prompt_type: str) -> float:
+        return self.thresholds.get(prompt_type, self.threshold)
+
+    def _local_answer(self, text: str, prompt_type: str) -> Optional[str]:
+        if self.threshold_for(prompt_type) == float("inf"):
+            self._count(prompt_type, "escalated")
+            return None
+        try:
+            extraction = self.local.extract(text, prompt_type)
+        except Exception as e:
+            logger.error(f"Local extraction failed for {prompt_type}: {str(e)}")
+            self._count(prompt_type, "escalated")
+            return None
+        if extraction.confidence >= self.threshold_for(prompt_type):
+            self._count(prompt_type, "local")
+            return extraction.output
+        logger.info(f"Escalating {prompt_type} to the remote model ({extraction.confidence:.2f}): {extraction.reason}")
+        self._count(prompt_type, "escalated")
+        return None
+
+    def process_text(self, text: str, prompt_type: str):
+        answer = self._local_answer(text, prompt_type)
+        return answer if answer is not None else self.remote.process_text(text, prompt_type)
+
+    async def process_text_async(self, text: str, prompt_type: str):
+        answer = self._local_answer(text, prompt_type)
+        return answer if answer is not None else await self.remote.process_text_async(text, prompt_type)
+
+    def process_packed(self, documents: List[tuple], prompt_type: str, answer_tokens: int = 64) -> str:
+        # Packed prompts are a remote-only optimisation
+        return self.remote.process_packed(documents, prompt_type, answer_tokens)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Per prompt type: answers served locally and answers escalated to the remote model."""
+        with self._lock:
+            return {prompt_type: dict(counts) for prompt_type, counts in self._metrics.items()}
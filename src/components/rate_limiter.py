@@ -0,0 +1,284 @@
+import re
+import math
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Admission order when callers wait on the same model; unknown classes rank as "normal"
+PRIORITY_RANK = {"interactive": 0, "normal": 1, "bulk": 2}
+
+# Priority class of the work running in this context, set by JobScheduler for each job
+current_priority = contextvars.ContextVar("request_priority", default="normal")
+
+
+@contextmanager
+def request_priority(priority: str):
+    """Run the enclosed completions at the given priority class."""
+    token = current_priority.set(priority)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+class TokenBucket:
+    """
+    Continuously refilling budget. A request is admitted once the bucket holds
+    its cost (or the full capacity, for requests larger than the bucket) and
+    may drive the level negative, so large prompts delay the ones behind them
+    instead of being rejected.
+    """
+
+    def __init__(self, rate_per_minute: float, burst_seconds: float):
+        self.burst_seconds = burst_seconds
+        self.ceiling = rate_per_minute
+        self.rate = max(rate_per_minute, 1.0) / 60.0
+        self.capacity = max(self.rate * self.burst_seconds, 1.0)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def set_rate(self, rate_per_minute: float) -> None:
+        self.refill(time.monotonic())
+        self.rate = max(rate_per_minute, 1.0) / 60.0
+        self.capacity = max(self.rate * self.burst_seconds, 1.0)
+        self.level = min(self.level, self.capacity)
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, cost: float) -> float:
+        """Seconds until a request of this cost can be admitted (0 if it can go now)."""
+        needed = min(cost, self.capacity) - self.level
+        return 0.0 if needed <= 0 else needed / self.rate
+
+
+class ModelBudget:
+    """Requests-per-minute and tokens-per-minute budgets for one model."""
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, burst_seconds: float):
+        self.requests = TokenBucket(requests_per_minute, burst_seconds)
+        self.tokens = TokenBucket(tokens_per_minute, burst_seconds)
+        self.blocked_until = 0.0
+
+
+class RequestScheduler:
+    """
+    Client-side admission control in front of the OpenAI compatible client.
+    Each completion is charged its estimated prompt tokens plus max_tokens
+    against per-model RPM/TPM budgets. Limits follow the provider's
+    x-ratelimit-* headers, and a 429 pauses that model instead of failing
+    the document. When callers queue on a model, higher priority classes
+    (interactive, then normal, then bulk) are admitted first. When several
+    processes spend one API key, give each a share (e.g. 1/N) of it: header
+    limits and remaining counts are scaled by it, so their rates never add up
+    to more than the key allows.
+    """
+
+    def __init__(
+            self,
+            requests_per_minute: float = 60,
+            tokens_per_minute: float = 60000,
+            burst_seconds: float = 5.0,
+            max_retries: int = 3,
+            model_limits: Optional[Dict[str, Tuple[float, float]]] = None,
+            share: float = 1.0,
+            ):
+        self.share = share
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.burst_seconds = burst_seconds
+        self.max_retries = max_retries
+        self.model_limits = model_limits or {}
+        self._budgets: Dict[str, ModelBudget] = {}
+        self._condition = threading.Condition()
+        self._queue_depth = 0
+        # Callers waiting per model and priority rank
+        self._waiting: Dict[str, List[int]] = {}
+        self._metrics = {
+            "admitted": 0,
+            "throttled": 0,
+            "total_wait": 0.0,
+            "max_wait": 0.0,
+        }
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """
+        Rough local token count for a rendered prompt, without a tokenizer:
+        the larger of ~4 characters per token and ~0.75 words per token.
+        """
+        if not text:
+            return 0
+        words = len(re.findall(r"\w+|[^\w\s]", text))
+        return max(math.ceil(len(text) / 4), math.ceil(words * 4 / 3))
+
+    def _budget(self, model: str) -> ModelBudget:
+        if model not in self._budgets:
+            rpm, tpm = self.model_limits.get(model, (self.requests_per_minute, self.tokens_per_minute))
+            self._budgets[model] = ModelBudget(rpm, tpm, self.burst_seconds)
+        return self._budgets[model]
+
+    def acquire(self, model: str, tokens: int, priority: Optional[str] = None) -> float:
+        """
+        Block until the model's budgets admit one request of `tokens`, after
+        any waiting callers of a higher priority class; return the wait.
+        priority defaults to the class of the job running in this context.
+        """
+        start = time.monotonic()
+        rank = PRIORITY_RANK.get(priority or current_priority.get(), PRIORITY_RANK["normal"])
+        with self._condition:
+            budget = self._budget(model)
+            waiting = self._waiting.setdefault(model, [0] * len(PRIORITY_RANK))
+            waiting[rank] += 1
+            self._queue_depth += 1
+            try:
+                while True:
+                    if any(waiting[:rank]):
+                        # A higher class is queued on this model; it notifies once admitted
+                        self._condition.wait()
+                        continue
+                    now = time.monotonic()
+                    budget.requests.refill(now)
+                    budget.tokens.refill(now)
+                    delay = max(
+                        budget.blocked_until - now,
+                        budget.requests.time_until(1),
+                        budget.tokens.time_until(tokens),
+                    )
+                    if delay <= 0:
+                        break
+                    self._condition.wait(timeout=delay)
+                budget.requests.level -= 1
+                budget.tokens.level -= tokens
+            finally:
+                waiting[rank] -= 1
+                self._queue_depth -= 1
+                self._condition.notify_all()
+
+            waited = time.monotonic() - start
+            self._metrics["admitted"] += 1
+            self._metrics["total_wait"] += waited
+            self._metrics["max_wait"] = max(self._metrics["max_wait"], waited)
+        return waited
+
+    def refund(self, model: str, tokens: int) -> None:
+        """Return over-estimated tokens once the real usage is known."""
+        if tokens <= 0:
+            return
+        with self._condition:
+            budget = self._budget(model)
+            budget.tokens.level = min(budget.tokens.capacity, budget.tokens.level + tokens)
+            self._condition.notify_all()
+
+    def update_from_headers(self, model: str, headers: Any, throttled: bool = False, attempt: int = 0) -> None:
+        """
+        Adapt a model's budgets from rate limit response headers. On a 429 the
+        model is paused for retry-after (or an exponential backoff) and its
+        rates are cut; successful responses let them recover towards the limit.
+        """
+        headers = {str(key).lower(): value for key, value in dict(headers or {}).items()}
+        with self._condition:
+            budget = self._budget(model)
+            now = time.monotonic()
+            for bucket, kind in ((budget.requests, "requests"), (budget.tokens, "tokens")):
+                limit = _header_float(headers, f"x-ratelimit-limit-{kind}")
+                if limit:
+                    # Headers describe the whole key; this scheduler may only use its share of it
+                    limit *= self.share
+                    bucket.ceiling = limit
+                if throttled:
+                    bucket.set_rate(bucket.rate * 60 * 0.8)
+                elif bucket.rate * 60 < bucket.ceiling:
+                    bucket.set_rate(min(bucket.ceiling, bucket.rate * 60 * 1.05))
+                elif limit:
+                    bucket.set_rate(limit)
+                remaining = _header_float(headers, f"x-ratelimit-remaining-{kind}")
+                if remaining is not None:
+                    bucket.refill(now)
+                    bucket.level = min(bucket.level, remaining * self.share)
+
+            if throttled:
+                self._metrics["throttled"] += 1
+                retry_after = _header_float(headers, "retry-after")
+                retry_after_ms = _header_float(headers, "retry-after-ms")
+                if retry_after_ms is not None:
+                    retry_after = retry_after_ms / 1000
+                if retry_after is None:
+                    retry_after = min(2 ** attempt, 30)
+                budget.blocked_until = max(budget.blocked_until, now + retry_after)
+                logger.warning(f"Rate limited on {model}, pausing for {retry_after:.1f}s")
+            self._condition.notify_all()
+
+    def create_completion(
+            self,
+            client: Any,
+            model: str,
+            messages: List[Dict],
+            max_tokens: int,
+            priority: Optional[str] = None,
+            **kwargs,
+            ):
+        """Run a chat completion once the model's RPM/TPM budgets admit it."""
+        prompt_tokens = sum(self.estimate_tokens(message.get("content", "")) for message in messages)
+        cost = prompt_tokens + max_tokens
+        if hasattr(client, "with_options"):
+            # Retrying inside the SDK would bypass the budgets and the 429 backoff below
+            client = client.with_options(max_retries=0)
+        completions = client.chat.completions
+        raw_api = getattr(completions, "with_raw_response", None)
+
+        for attempt in range(self.max_retries + 1):
+            self.acquire(model, cost, priority)
+            try:
+                if raw_api is not None:
+                    raw = raw_api.create(model=model, messages=messages, max_tokens=max_tokens, **kwargs)
+                    self.update_from_headers(model, raw.headers)
+                    response = raw.parse()
+                else:
+                    response = completions.create(model=model, messages=messages, max_tokens=max_tokens, **kwargs)
+            except Exception as e:
+                if getattr(e, "status_code", None) == 429 and attempt < self.max_retries:
+                    response_headers = getattr(getattr(e, "response", None), "headers", None)
+                    self.update_from_headers(model, response_headers, throttled=True, attempt=attempt)
+                    continue
+                raise
+
+            usage = getattr(response, "usage", None)
+            if usage is not None and getattr(usage, "total_tokens", None):
+                self.refund(model, cost - usage.total_tokens)
+            return response
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, wait times and current per-model limits."""
+        with self._condition:
+            admitted = self._metrics["admitted"]
+            return {
+                "queue_depth": self._queue_depth,
+                "admitted": admitted,
+                "throttled": self._metrics["throttled"],
+                "average_wait": self._metrics["total_wait"] / admitted if admitted else 0.0,
+                "max_wait": self._metrics["max_wait"],
+                "models": {
+                    model: {
+                        "requests_per_minute": round(budget.requests.rate * 60, 2),
+                        "tokens_per_minute": round(budget.tokens.rate * 60, 2),
+                    }
+                    for model, budget in self._budgets.items()
+                },
+            }
+
+
+def _header_float(headers: Dict[str, Any], name: str) -> Optional[float]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,130 @@
+import asyncio
+import functools
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls. The first caller for a key runs the
+    work; callers arriving while it is in progress, from other threads or
+    asyncio tasks, wait for and share its result (or exception). Nothing is
+    cached: once the call finishes the next caller runs it again.
+
+    Callers may pass a deadline (a time.monotonic() value) when the work
+    returns early at it. A caller never shares a call that gives up sooner
+    than it asked for (or at all, when it has no deadline itself), since that
+    would hand it a shorter partial result. A caller with a deadline waits
+    for a shared call at most until its deadline, then runs the work itself,
+    so joining never stretches its latency.
+    """
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Tuple[Future, Optional[float]]] = {}
+        self._metrics = {"calls": 0, "executions": 0, "coalesced": 0, "wait_expired": 0}
+
+    def _join(self, key: Hashable, deadline: Optional[float] = None) -> Tuple[Future, bool]:
+        """Return the in-flight future for key and whether this caller leads it."""
+        with self._lock:
+            self._metrics["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                future, leader_deadline = call
+                if leader_deadline is None or (deadline is not None and deadline <= leader_deadline):
+                    self._metrics["coalesced"] += 1
+                    return future, False
+                # The running call gives up sooner than this caller wants: run separately, unregistered
+                self._metrics["executions"] += 1
+                return Future(), True
+            future = Future()
+            self._calls[key] = (future, deadline)
+            self._metrics["executions"] += 1
+            return future, True
+
+    def _finish(self, key: Hashable, future: Future, result: Any = None, error: BaseException = None) -> None:
+        with self._lock:
+            if key in self._calls and self._calls[key][0] is future:
+                del self._calls[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _wait_expired(self, key: Hashable) -> None:
+        with self._lock:
+            self._metrics["wait_expired"] += 1
+            self._metrics["executions"] += 1
+        logger.debug(f"Deadline reached waiting on shared {self.name} call for {key!r}, running it directly")
+
+    def do(self, key: Hashable, fn: Callable, *args, deadline: Optional[float] = None, **kwargs) -> Any:
+        """Run fn(*args, **kwargs), or wait for an identical call already running."""
+        future, leader = self._join(key, deadline)
+        if not leader:
+            logger.debug(f"Coalesced {self.name} call for {key!r}")
+            try:
+                return future.result(timeout=None if deadline is None else max(deadline - time.monotonic(), 0))
+            except TimeoutError:
+                if future.done():
+                    raise
+            self._wait_expired(key)
+            return fn(*args, **kwargs)
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    @staticmethod
+    def _start(fn: Callable, *args, **kwargs) -> "asyncio.Future":
+        if asyncio.iscoroutinefunction(fn):
+            return asyncio.ensure_future(fn(*args, **kwargs))
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(None, functools.partial(fn, *args, **kwargs))
+
+    async def do_async(self, key: Hashable, fn: Callable, *args, deadline: Optional[float] = None, **kwargs) -> Any:
+        """
+        Async counterpart of do(). fn may be a coroutine function or a plain
+        function, which is then run in the loop's default executor. The work
+        runs as its own task, so cancelling the caller that started it (or
+        any caller waiting on it) does not cancel it for the others.
+        """
+        future, leader = self._join(key, deadline)
+        if not leader:
+            logger.debug(f"Coalesced {self.name} call for {key!r}")
+            shared = asyncio.shield(asyncio.wrap_future(future))
+            try:
+                return await asyncio.wait_for(
+                    shared, timeout=None if deadline is None else max(deadline - time.monotonic(), 0)
+                )
+            except asyncio.TimeoutError:
+                if future.done():
+                    raise
+            self._wait_expired(key)
+            return await self._start(fn, *args, **kwargs)
+        work = self._start(fn, *args, **kwargs)
+        work.add_done_callback(lambda done: self._settle(key, future, done))
+        return await asyncio.shield(work)
+
+    def _settle(self, key: Hashable, future: Future, work: "asyncio.Future") -> None:
+        if work.cancelled():
+            self._finish(key, future, error=asyncio.CancelledError())
+        elif work.exception() is not None:
+            self._finish(key, future, error=work.exception())
+        else:
+            self._finish(key, future, result=work.result())
+
+    def stats(self) -> Dict[str, int]:
+        """Calls seen, calls actually executed and calls served by another's execution."""
+        with self._lock:
+            stats = dict(self._metrics)
+            stats["in_flight"] = len(self._calls)
+        return stats
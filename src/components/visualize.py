@@ -1,10 +1,14 @@
 import folium
 import json
 from shapely.geometry import mapping 
-from shapely import wkt
+from src.components.geolocation import GeoDataMethods
 
 
-def create_map_with_geojson(data):
+def create_map_with_geojson(data, resolve_polygons=True, stats=None):
+    # Polygons are fetched lazily: swap placeholder points for real outlines before drawing
+    if resolve_polygons:
+        GeoDataMethods.resolve_polygons(data, stats)
+
     # Define the center of the map based on the first location in the JSON data
     first_location = data[0]['Geo_Locations'][0]  # Access the first location
     map_center = [first_location['Latitude'], first_location['Longitude']]  # Set map center
@@ -25,13 +29,14 @@ def create_map_with_geojson(data):
         ).add_to(m)
     
     for item in data:
-      geojson_str = item['Geometry']  # Access the 'Geometry' field (WKT format string)
-
-      # Convert WKT string to Shapely geometry
-      shapely_geom = wkt.loads(geojson_str)  # Convert the WKT string to a Shapely object
-
-      # Convert the Shapely geometry to a GeoJSON-like dict
-      geojson_dict = mapping(shapely_geom)
+      # Use the GeoJSON carried from geocoding as is, only rebuild it when the
+      # record was loaded from a serialised Geometry (WKB, WKT or a Shapely object)
+      geojson_dict = item.get('GeoJSON')
+      if geojson_dict is None:
+        shapely_geom = GeoDataMethods.decode_geometry(item.get('Geometry'))
+        if shapely_geom is None:
+          continue
+        geojson_dict = mapping(shapely_geom)
       add_geojson_to_map(m, geojson_dict)
     
     return m
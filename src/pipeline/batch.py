@@ -0,0 +1,119 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+from src.components.Prompt_template import PromptTemplateGenerator
+from src.components.rate_limiter import RequestScheduler, request_priority
+
+logger = logging.getLogger(__name__)
+
+# Prompt types that can be answered for several documents in one completion
+PACKED_STAGES = ["event_type", "entities", "names", "phone_numbers", "locations"]
+
+
+class BatchProcessor:
+    """
+    Batch processing for an EntityExplorer with multi-document packing.
+
+    Short documents (alerts, headlines) are grouped so that each prompt type
+    is answered for a whole pack in a single completion. Each parsed answer
+    is written to the explorer's stage checkpoint. The normal process_text
+    call then resumes those stages and only re-runs, one document at a time,
+    the ones whose answer was missing or garbled. Packs are sized to fit a
+    token budget and shrink for a prompt type whose packs keep failing.
+    All of its work runs in the "bulk" priority class, behind interactive use.
+    """
+
+    def __init__(
+            self,
+            explorer: Any,
+            short_document_words: int = 100,
+            token_budget: int = 3000,
+            answer_tokens: int = 64,
+            max_pack_size: int = 16,
+            ):
+        self.explorer = explorer
+        self.short_document_words = short_document_words
+        self.token_budget = token_budget
+        self.answer_tokens = answer_tokens
+        self.max_pack_size = max_pack_size
+        self._pack_limits: Dict[str, int] = {stage: max_pack_size for stage in PACKED_STAGES}
+        self.stats = {"packs": 0, "packed_answers": 0, "fallbacks": 0}
+
+    def is_short(self, text: str) -> bool:
+        return bool(text and text.strip()) and len(text.split()) <= self.short_document_words
+
+    def make_packs(self, texts: List[str], prompt_type: str) -> List[List[int]]:
+        """Greedily group document indexes so each packed prompt stays within the token budget."""
+        overhead = RequestScheduler.estimate_tokens(PromptTemplateGenerator.generate_packed_prompt(prompt_type, []))
+        limit = self._pack_limits[prompt_type]
+        packs, current, used = [], [], overhead
+        for index, text in enumerate(texts):
+            cost = RequestScheduler.estimate_tokens(text) + self.answer_tokens + 10  # doc tags and id prefix
+            if current and (used + cost > self.token_budget or len(current) >= limit):
+                packs.append(current)
+                current, used = [], overhead
+            current.append(index)
+            used += cost
+        if current:
+            packs.append(current)
+        return packs
+
+    def _adapt(self, prompt_type: str, pack_size: int, answered: int) -> None:
+        """
+        Halve a prompt type's pack limit when most answers were lost, grow it back
+        slowly on success. The limit never drops below two, so a type keeps being
+        packed (and can recover) instead of silently falling back for good.
+        """
+        if answered < pack_size / 2:
+            self._pack_limits[prompt_type] = max(2, pack_size // 2)
+        elif answered == pack_size:
+            self._pack_limits[prompt_type] = min(self.max_pack_size, self._pack_limits[prompt_type] + 1)
+
+    def prefill(self, texts: List[str]) -> None:
+        """Answer every packed stage for the short documents and checkpoint the parsed answers."""
+        short = [text for text in dict.fromkeys(texts) if self.is_short(text)]
+        if len(short) < 2:
+            return
+        chat_processor = self.explorer.chat_processor
+        checkpoints = self.explorer.checkpoints
+
+        for prompt_type in PACKED_STAGES:
+            # Skip documents whose stage is already checkpointed from an earlier run
+            pending = [text for text in short if prompt_type not in checkpoints.load(self.explorer.checkpoint_key(text))]
+            for pack in self.make_packs(pending, prompt_type):
+                if len(pack) < 2:
+                    continue
+                documents = [(str(position + 1), pending[index]) for position, index in enumerate(pack)]
+                try:
+                    output = chat_processor.process_packed(documents, prompt_type, self.answer_tokens)
+                except Exception as e:
+                    logger.error(f"Packed {prompt_type} request failed, documents will run individually: {str(e)}")
+                    self._adapt(prompt_type, len(pack), 0)
+                    continue
+
+                answers = self.explorer.content_extractor.split_packed_answers(
+                    output, [doc_id for doc_id, _ in documents], prompt_type
+                )
+                for doc_id, text in documents:
+                    if doc_id in answers:
+                        checkpoints.save_stage(self.explorer.checkpoint_key(text), prompt_type, answers[doc_id])
+                self.stats["packs"] += 1
+                self.stats["packed_answers"] += len(answers)
+                self.stats["fallbacks"] += len(documents) - len(answers)
+                self._adapt(prompt_type, len(pack), len(answers))
+
+    def process(self, texts: List[str], pack: bool = True, timeout: Optional[float] = None) -> List[Any]:
+        """Process a batch of documents, packing short ones, and return one result per input text."""
+        if pack:
+            with request_priority("bulk"):
+                self.prefill(texts)
+        futures = [self.explorer.submit(text, priority="bulk", timeout=timeout) for text in texts]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except TimeoutError as e:
+                logger.error(f"Batch document not processed: {str(e)}")
+                results.append(None)
+        logger.info(f"Batch packing stats: {self.stats}")
+        return results
@@ -0,0 +1,67 @@
+import os
+import json
+import shutil
+import logging
+import tempfile
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointStore:
+    """
+    Per-document stage results on disk: a directory per document key holding
+    one JSON file per stage. Each stage is written as soon as it completes, so
+    a retry after a failure only has to re-run the stages that are missing.
+
+    Every stage file is written to its own temporary file and renamed into
+    place, and no file is ever read-modified-written. Threads and worker
+    processes sharing the directory can therefore save stages of the same
+    document without losing each other's writes.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def load(self, key: str) -> Dict[str, Any]:
+        """Completed stage results for a document, keyed by stage name."""
+        path = self._path(key)
+        try:
+            names = os.listdir(path)
+        except FileNotFoundError:
+            return {}
+        stages = {}
+        for name in names:
+            if not name.endswith(".json"):
+                continue  # an unfinished temporary file
+            stage_path = os.path.join(path, name)
+            try:
+                with open(stage_path) as stage_file:
+                    stages[name[:-len(".json")]] = json.load(stage_file)
+            except FileNotFoundError:
+                continue  # cleared concurrently
+            except (OSError, ValueError) as e:
+                logger.error(f"Ignoring unreadable checkpoint {stage_path}: {str(e)}")
+        return stages
+
+    def save_stage(self, key: str, stage: str, value: Any) -> None:
+        """Record one completed stage, replacing its file atomically."""
+        path = self._path(key)
+        os.makedirs(path, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path, prefix=f".{stage}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as stage_file:
+                json.dump(value, stage_file)
+            os.replace(tmp_path, os.path.join(path, f"{stage}.json"))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def clear(self, key: str) -> None:
+        """Drop a document's checkpoint once every stage has succeeded."""
+        shutil.rmtree(self._path(key), ignore_errors=True)
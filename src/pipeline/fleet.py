@@ -0,0 +1,215 @@
+"""
+Multi-process worker fleet for EntityExplorer, coordinated via a local SQLite JobQueue.
+
+    python -m src.pipeline.fleet enqueue corpus.jsonl          # or a directory of .txt files
+    python -m src.pipeline.fleet work --processes 8 --rpm 60   # one worker per core, 60 RPM in total
+    python -m src.pipeline.fleet watch                         # progress until the queue drains
+    python -m src.pipeline.fleet results --status dead         # dump results or dead letters
+
+All workers run on the machine holding the queue file; no broker is involved.
+The LLM rate limits given to `work` apply to the whole fleet and are divided
+evenly between its processes, since every worker spends the same API key.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import logging
+import argparse
+import threading
+import multiprocessing
+from typing import Any, Dict, List, Optional
+
+from src.components.rate_limiter import RequestScheduler
+from src.pipeline.job_queue import JobQueue
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE = os.path.join("artifacts", "jobs.sqlite")
+
+
+def load_corpus(path: str) -> List[Dict[str, Any]]:
+    """Read documents from a JSONL file ({"id": ..., "text": ...}) or a directory of .txt files."""
+    documents = []
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.endswith(".txt"):
+                with open(os.path.join(path, name)) as text_file:
+                    documents.append({"id": name, "text": text_file.read()})
+    else:
+        with open(path) as corpus_file:
+            for line_number, line in enumerate(corpus_file, start=1):
+                if line.strip():
+                    document = json.loads(line)
+                    document.setdefault("id", str(line_number))
+                    documents.append(document)
+    return documents
+
+
+def _heartbeat(queue: JobQueue, job_id: int, worker_id: str, lease_seconds: float, stop: threading.Event) -> None:
+    # Renew at a third of the lease so one missed beat does not lose the job
+    while not stop.wait(lease_seconds / 3):
+        if not queue.heartbeat(job_id, worker_id, lease_seconds):
+            logger.warning(f"{worker_id} lost the lease on job {job_id}")
+            return
+
+
+def run_worker(
+        queue_path: str,
+        worker_id: Optional[str] = None,
+        lease_seconds: float = 300,
+        poll_interval: float = 2.0,
+        exit_when_empty: bool = True,
+        timeout: Optional[float] = None,
+        requests_per_minute: float = 60,
+        tokens_per_minute: float = 60000,
+        share: float = 1.0,
+        ) -> int:
+    """
+    Lease and process jobs until the queue is empty (or forever); return the number processed.
+    requests_per_minute and tokens_per_minute are this worker's part of the fleet's LLM limits,
+    and share the fraction of the key's rate limit headers it may grow into.
+    """
+    from app import EntityExplorer, results_to_dict
+
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    queue = JobQueue(queue_path)
+    explorer = EntityExplorer(scheduler=RequestScheduler(requests_per_minute, tokens_per_minute, share=share))
+    processed = 0
+
+    while True:
+        job = queue.lease(worker_id, lease_seconds)
+        if job is None:
+            if exit_when_empty and not queue.progress()["leased"]:
+                return processed
+            time.sleep(poll_interval)
+            continue
+
+        stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=_heartbeat, args=(queue, job["id"], worker_id, lease_seconds, stop), daemon=True
+        )
+        heartbeat.start()
+        try:
+            # Bulk class, so a web UI in the same process is served first
+            result = explorer.submit(job["payload"].get("text", ""), priority="bulk", timeout=timeout).result()
+            if result is None:
+                queue.fail(job["id"], worker_id, "Processing failed, see worker logs")
+            elif result.complete:
+                queue.complete(job["id"], worker_id, results_to_dict(result))
+            else:
+                # Finished stages are checkpointed, so the retry only re-runs the failed ones
+                queue.fail(job["id"], worker_id, json.dumps(result.errors), results_to_dict(result))
+        except Exception as e:
+            logger.error(f"{worker_id} failed job {job['id']}: {str(e)}")
+            queue.fail(job["id"], worker_id, str(e))
+        finally:
+            stop.set()
+            heartbeat.join()
+        processed += 1
+
+
+def _worker_process(
+        queue_path: str,
+        index: int,
+        lease_seconds: float,
+        exit_when_empty: bool,
+        timeout: Optional[float],
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        share: float,
+        ) -> None:
+    from src.utils import setup_logging
+    setup_logging()
+    run_worker(
+        queue_path,
+        worker_id=f"{socket.gethostname()}-{os.getpid()}-{index}",
+        lease_seconds=lease_seconds,
+        exit_when_empty=exit_when_empty,
+        timeout=timeout,
+        requests_per_minute=requests_per_minute,
+        tokens_per_minute=tokens_per_minute,
+        share=share,
+    )
+
+
+def watch(queue: JobQueue, interval: float = 5.0) -> Dict[str, int]:
+    """Print progress until nothing is queued or leased."""
+    start = time.monotonic()
+    while True:
+        progress = queue.progress()
+        total = sum(progress.values())
+        finished = progress["done"] + progress["dead"]
+        elapsed = time.monotonic() - start
+        print(
+            f"[{elapsed:7.0f}s] {finished}/{total} finished  "
+            f"queued={progress['queued']} leased={progress['leased']} done={progress['done']} dead={progress['dead']}",
+            flush=True,
+        )
+        if not progress["queued"] and not progress["leased"]:
+            return progress
+        time.sleep(interval)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="LLM Entity Explorer worker fleet")
+    parser.add_argument("--queue", default=DEFAULT_QUEUE, help="Path of the SQLite job queue")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = commands.add_parser("enqueue", help="Add a corpus to the queue")
+    enqueue_parser.add_argument("corpus", help="JSONL file with a 'text' field per line, or a directory of .txt files")
+    enqueue_parser.add_argument("--max-attempts", type=int, default=3)
+
+    work_parser = commands.add_parser("work", help="Run worker processes")
+    work_parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    work_parser.add_argument("--lease-seconds", type=float, default=300)
+    work_parser.add_argument("--timeout", type=float, default=None, help="Per-document deadline in seconds")
+    work_parser.add_argument("--forever", action="store_true", help="Keep polling when the queue is empty")
+    work_parser.add_argument("--rpm", type=float, default=60, help="LLM requests per minute for the whole fleet")
+    work_parser.add_argument("--tpm", type=float, default=60000, help="LLM tokens per minute for the whole fleet")
+
+    watch_parser = commands.add_parser("watch", help="Show progress until the queue drains")
+    watch_parser.add_argument("--interval", type=float, default=5.0)
+
+    results_parser = commands.add_parser("results", help="Print results as JSON lines")
+    results_parser.add_argument("--status", default="done", choices=["done", "dead"])
+
+    commands.add_parser("requeue-dead", help="Retry dead-lettered jobs")
+
+    args = parser.parse_args(argv)
+    os.makedirs(os.path.dirname(args.queue) or ".", exist_ok=True)
+
+    if args.command == "enqueue":
+        queue = JobQueue(args.queue, max_attempts=args.max_attempts)
+        count = queue.enqueue(load_corpus(args.corpus))
+        print(f"Enqueued {count} documents into {args.queue}")
+    elif args.command == "work":
+        JobQueue(args.queue)
+        # Each process has its own RequestScheduler, so each gets an equal share of the key's limits
+        # and scales the key-wide x-ratelimit-* headers down to that share instead of climbing to the full limit
+        share = 1 / args.processes
+        rpm, tpm = args.rpm * share, args.tpm * share
+        processes = [
+            multiprocessing.Process(
+                target=_worker_process,
+                args=(args.queue, index, args.lease_seconds, not args.forever, args.timeout, rpm, tpm, share),
+            )
+            for index in range(args.processes)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    elif args.command == "watch":
+        watch(JobQueue(args.queue), args.interval)
+    elif args.command == "results":
+        for row in JobQueue(args.queue).results(args.status):
+            print(json.dumps(row))
+    elif args.command == "requeue-dead":
+        print(f"Requeued {JobQueue(args.queue).requeue_dead()} jobs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+import json
+import time
+import sqlite3
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    doc_id TEXT,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_expires);
+"""
+
+
+class JobQueue:
+    """
+    Durable job queue in a local SQLite file, shared by worker processes on
+    one machine (not over a network filesystem).
+
+    A worker leases a job for lease_seconds and keeps it alive with
+    heartbeats. If the worker dies, the lease expires and another worker
+    takes the job over. Each lease counts as an attempt; a job that fails
+    or is abandoned max_attempts times is moved to the 'dead' status
+    (dead-lettered) with its last error. Statuses: queued, leased, done, dead.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3):
+        self.path = path
+        self.max_attempts = max_attempts
+        with self._connection() as connection:
+            connection.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per operation keeps the queue safe to share across processes.
+        # WAL relies on shared memory, so every worker must be on the machine that holds the file.
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA busy_timeout=30000")
+        return connection
+
+    @contextmanager
+    def _connection(self):
+        connection = self._connect()
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def enqueue(self, payloads: List[Dict[str, Any]]) -> int:
+        """Add jobs; each payload is a JSON-serialisable dict, optionally with an "id"."""
+        now = time.time()
+        rows = [(payload.get("id"), json.dumps(payload), self.max_attempts, now, now) for payload in payloads]
+        with self._connection() as connection:
+            connection.executemany(
+                "INSERT INTO jobs (doc_id, payload, max_attempts, created, updated) VALUES (?, ?, ?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def _dead_letter_expired(self, connection: sqlite3.Connection, now: float) -> None:
+        connection.execute(
+            """UPDATE jobs SET status = 'dead', lease_owner = NULL, updated = ?,
+                   error = COALESCE(error, 'Lease expired on the final attempt')
+               WHERE status = 'leased' AND lease_expires < ? AND attempts >= max_attempts""",
+            (now, now),
+        )
+
+    def lease(self, worker_id: str, lease_seconds: float = 300) -> Optional[Dict[str, Any]]:
+        """Claim the oldest queued job, or one whose lease expired; None if there is nothing to do."""
+        now = time.time()
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            self._dead_letter_expired(connection, now)
+            row = connection.execute(
+                """SELECT id, payload, attempts FROM jobs
+                   WHERE status = 'queued'
+                      OR (status = 'leased' AND lease_expires < ? AND attempts < max_attempts)
+                   ORDER BY id LIMIT 1""",
+                (now,),
+            ).fetchone()
+            if row is None:
+                connection.execute("COMMIT")
+                return None
+            job_id, payload, attempts = row
+            connection.execute(
+                """UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?,
+                       attempts = attempts + 1, updated = ?
+                   WHERE id = ?""",
+                (worker_id, now + lease_seconds, now, job_id),
+            )
+            connection.execute("COMMIT")
+            return {"id": job_id, "payload": json.loads(payload), "attempt": attempts + 1}
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+
+    def heartbeat(self, job_id: int, worker_id: str, lease_seconds: float = 300) -> bool:
+        """Extend a lease; False means the job was taken over and the worker should stop reporting it."""
+        now = time.time()
+        with self._connection() as connection:
+            cursor = connection.execute(
+                """UPDATE jobs SET lease_expires = ?, updated = ?
+                   WHERE id = ? AND lease_owner = ? AND status = 'leased'""",
+                (now + lease_seconds, now, job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker_id: str, result: Any) -> bool:
+        """Store a job's result and mark it done, if the worker still holds the lease."""
+        now = time.time()
+        with self._connection() as connection:
+            cursor = connection.execute(
+                """UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_owner = NULL, updated = ?
+                   WHERE id = ? AND lease_owner = ? AND status = 'leased'""",
+                (json.dumps(result), now, job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str, result: Any = None) -> bool:
+        """Record a failed attempt: requeue it, or dead-letter it once attempts are used up."""
+        now = time.time()
+        with self._connection() as connection:
+            cursor = connection.execute(
+                """UPDATE jobs SET
+                       status = CASE WHEN attempts >= max_attempts THEN 'dead' ELSE 'queued' END,
+                       error = ?, result = ?, lease_owner = NULL, lease_expires = NULL, updated = ?
+                   WHERE id = ? AND lease_owner = ? AND status = 'leased'""",
+                (error, json.dumps(result) if result is not None else None, now, job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def requeue_dead(self) -> int:
+        """Give dead-lettered jobs a fresh set of attempts."""
+        now = time.time()
+        with self._connection() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = 'queued', attempts = 0, updated = ? WHERE status = 'dead'", (now,)
+            )
+            return cursor.rowcount
+
+    def progress(self) -> Dict[str, int]:
+        """Number of jobs in each status."""
+        with self._connection() as connection:
+            self._dead_letter_expired(connection, time.time())
+            counts = dict(connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in ("queued", "leased", "done", "dead")}
+
+    def results(self, status: str = "done") -> List[Dict[str, Any]]:
+        """Jobs in a status with their payload id, result and last error."""
+        with self._connection() as connection:
+            rows = connection.execute(
+                "SELECT id, doc_id, attempts, result, error FROM jobs WHERE status = ? ORDER BY id", (status,)
+            ).fetchall()
+        return [
+            {
+                "job_id": job_id,
+                "doc_id": doc_id,
+                "attempts": attempts,
+                "result": json.loads(result) if result else None,
+                "error": error,
+            }
+            for job_id, doc_id, attempts, result, error in rows
+        ]
@@ -0,0 +1,223 @@
+import time
+import logging
+import itertools
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from src.components.rate_limiter import request_priority
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PriorityClass:
+    """A traffic class: its share of dispatches and how many of its jobs may run at once."""
+    name: str
+    weight: float
+    max_concurrency: int
+
+
+@dataclass
+class Job:
+    priority: str
+    fn: Callable
+    args: tuple
+    kwargs: dict
+    future: Future
+    submitted: float
+    deadline: Optional[float] = None
+    finish_tag: float = 0.0
+    sequence: int = 0
+
+
+@dataclass
+class _ClassState:
+    config: PriorityClass
+    queue: List[Job] = field(default_factory=list)
+    running: int = 0
+    virtual_time: float = 0.0
+    # Exponentially weighted service time, used to decide when a deadline is at risk
+    service_time: float = 1.0
+    completed: int = 0
+    expired: int = 0
+    total_wait: float = 0.0
+
+
+def default_classes(max_workers: int) -> List[PriorityClass]:
+    """Interactive may use every worker; bulk always leaves one free for interactive work."""
+    return [
+        PriorityClass("interactive", weight=8, max_concurrency=max_workers),
+        PriorityClass("normal", weight=3, max_concurrency=max_workers),
+        PriorityClass("bulk", weight=1, max_concurrency=max(1, max_workers - 1)),
+    ]
+
+
+class JobScheduler:
+    """
+    Priority-aware dispatcher for EntityExplorer work sharing one LLM key and
+    Nominatim allowance. Jobs are ordered by weighted fair queuing across
+    classes, each class has a concurrency cap, and a queued job whose deadline
+    would be missed at its class's typical service time jumps the queue.
+    Jobs still queued after their deadline fail with TimeoutError. A job's
+    class is also the priority its LLM calls get in the RequestScheduler.
+
+        scheduler = JobScheduler(explorer.process_text, max_workers=4)
+        future = scheduler.submit(text, priority="interactive", timeout=30)
+        result = future.result()
+    """
+
+    def __init__(
+            self,
+            handler: Callable,
+            max_workers: int = 4,
+            classes: Optional[List[PriorityClass]] = None,
+            ):
+        self.handler = handler
+        self.max_workers = max_workers
+        self._classes: Dict[str, _ClassState] = {
+            config.name: _ClassState(config) for config in (classes or default_classes(max_workers))
+        }
+        self._condition = threading.Condition()
+        self._sequence = itertools.count()
+        self._virtual_time = 0.0
+        self._shutdown = False
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"job-scheduler-{i}", daemon=True)
+            for i in range(max_workers)
+        ]
+        # Expires queued jobs on time even while every worker is busy
+        self._workers.append(threading.Thread(target=self._expiry, name="job-scheduler-expiry", daemon=True))
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, *args, priority: str = "normal", timeout: Optional[float] = None, **kwargs) -> Future:
+        """Queue handler(*args, **kwargs) in a priority class; timeout is seconds until its deadline."""
+        if priority not in self._classes:
+            raise ValueError(f"Unknown priority class: {priority}")
+        now = time.monotonic()
+        job = Job(
+            priority=priority,
+            fn=self.handler,
+            args=args,
+            kwargs=kwargs,
+            future=Future(),
+            submitted=now,
+            deadline=now + timeout if timeout is not None else None,
+        )
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("JobScheduler has been shut down")
+            state = self._classes[priority]
+            # Start-time fair queuing: a class that was idle does not bank credit
+            start_tag = max(state.virtual_time, self._virtual_time)
+            job.finish_tag = start_tag + 1.0 / state.config.weight
+            job.sequence = next(self._sequence)
+            state.virtual_time = job.finish_tag
+            state.queue.append(job)
+            self._condition.notify_all()
+        return job.future
+
+    def _expire(self, now: float) -> None:
+        for state in self._classes.values():
+            for job in [job for job in state.queue if job.deadline is not None and job.deadline <= now]:
+                state.queue.remove(job)
+                state.expired += 1
+                job.future.set_exception(TimeoutError(f"{job.priority} job missed its deadline while queued"))
+
+    def _nearest_deadline_wait(self) -> Optional[float]:
+        deadlines = [job.deadline for state in self._classes.values() for job in state.queue if job.deadline is not None]
+        return max(min(deadlines) - time.monotonic(), 0.01) if deadlines else None
+
+    def _expiry(self) -> None:
+        with self._condition:
+            while not self._shutdown:
+                self._expire(time.monotonic())
+                self._condition.wait(timeout=self._nearest_deadline_wait())
+
+    def _next_job(self) -> Optional[Job]:
+        """Pick the next job: at-risk deadlines first (earliest deadline), then smallest finish tag."""
+        now = time.monotonic()
+        self._expire(now)
+        eligible = [
+            job
+            for state in self._classes.values()
+            if state.running < state.config.max_concurrency
+            for job in state.queue
+        ]
+        if not eligible:
+            return None
+
+        at_risk = [
+            job for job in eligible
+            if job.deadline is not None and job.deadline - now <= self._classes[job.priority].service_time
+        ]
+        if at_risk:
+            job = min(at_risk, key=lambda job: (job.deadline, job.sequence))
+        else:
+            job = min(eligible, key=lambda job: (job.finish_tag, job.sequence))
+
+        state = self._classes[job.priority]
+        state.queue.remove(job)
+        state.running += 1
+        state.total_wait += now - job.submitted
+        self._virtual_time = max(self._virtual_time, job.finish_tag - 1.0 / state.config.weight)
+        return job
+
+    def _worker(self) -> None:
+        while True:
+            with self._condition:
+                job = self._next_job()
+                while job is None:
+                    if self._shutdown:
+                        return
+                    # Wake up in time to expire the nearest deadline even if nothing else happens
+                    self._condition.wait(timeout=self._nearest_deadline_wait())
+                    job = self._next_job()
+
+            if not job.future.set_running_or_notify_cancel():
+                self._done(job, 0.0)
+                continue
+            start = time.monotonic()
+            try:
+                with request_priority(job.priority):
+                    result = job.fn(*job.args, **job.kwargs)
+                job.future.set_result(result)
+            except BaseException as e:
+                logger.error(f"{job.priority} job failed: {str(e)}")
+                job.future.set_exception(e)
+            self._done(job, time.monotonic() - start)
+
+    def _done(self, job: Job, duration: float) -> None:
+        with self._condition:
+            state = self._classes[job.priority]
+            state.running -= 1
+            if duration:
+                state.completed += 1
+                state.service_time = 0.8 * state.service_time + 0.2 * duration
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Queue length, running jobs and waiting time per priority class."""
+        with self._condition:
+            return {
+                name: {
+                    "queued": len(state.queue),
+                    "running": state.running,
+                    "completed": state.completed,
+                    "expired": state.expired,
+                    "average_wait": state.total_wait / (state.completed or 1),
+                    "service_time": state.service_time,
+                }
+                for name, state in self._classes.items()
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting work; queued jobs still run before the workers exit."""
+        with self._condition:
+            self._shutdown = True
+            self._condition.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
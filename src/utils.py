@@ -18,6 +18,8 @@ def load_model() -> OpenAI:
         client = OpenAI(
             api_key=api_key,
             base_url="https://api.deepinfra.com/v1/openai",
+            # RequestScheduler owns retries: SDK retries would hide 429s from its budgets
+            max_retries=0,
         )
         logging.info("API client initialized successfully")
         return client
@@ -0,0 +1,61 @@
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+from src.pipeline.checkpoint import CheckpointStore
+
+
+def save_stages(directory, prefix, count):
+    store = CheckpointStore(directory)
+    for i in range(count):
+        store.save_stage("doc", f"{prefix}{i}", {"answer": i})
+
+
+def test_saved_stages_are_resumed_by_a_new_store(tmp_path):
+    CheckpointStore(str(tmp_path)).save_stage("doc", "entities", "Entities: WHO")
+    CheckpointStore(str(tmp_path)).save_stage("doc", "geocoding", {"records": [], "stats": {}})
+
+    assert CheckpointStore(str(tmp_path)).load("doc") == {
+        "entities": "Entities: WHO",
+        "geocoding": {"records": [], "stats": {}},
+    }
+    assert CheckpointStore(str(tmp_path)).load("other") == {}
+
+
+def test_saving_a_stage_again_replaces_it(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    store.save_stage("doc", "names", "Entities: A")
+    store.save_stage("doc", "names", "Entities: B")
+
+    assert store.load("doc") == {"names": "Entities: B"}
+
+
+def test_clear_drops_the_document(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    store.save_stage("doc", "names", "Entities: A")
+    store.clear("doc")
+    store.clear("doc")
+
+    assert store.load("doc") == {}
+
+
+def test_concurrent_threads_do_not_lose_stages(tmp_path):
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        for prefix in "abcd":
+            pool.submit(save_stages, str(tmp_path), prefix, 25)
+
+    assert len(CheckpointStore(str(tmp_path)).load("doc")) == 100
+
+
+def test_concurrent_processes_do_not_lose_stages(tmp_path):
+    processes = [
+        multiprocessing.Process(target=save_stages, args=(str(tmp_path), prefix, 25)) for prefix in "abcd"
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert [process.exitcode for process in processes] == [0, 0, 0, 0]
+    stages = CheckpointStore(str(tmp_path)).load("doc")
+    assert len(stages) == 100
+    assert stages["c24"] == {"answer": 24}
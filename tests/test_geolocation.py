@@ -0,0 +1,123 @@
+import pandas as pd
+import pytest
+from shapely import wkb
+from shapely.geometry import Point, shape
+
+from src.components import geolocation
+from src.components.geolocation import GeoDataMethods, GeoFetchStats
+
+
+class FakeResponse:
+    def __init__(self, items, status_code=200):
+        self.items = items
+        self.status_code = status_code
+        self.content = b"x" * 100
+
+    def json(self):
+        return self.items
+
+
+def polygon(ref):
+    return {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 0]]], "ref": ref}
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(GeoDataMethods, "_polygon_cache", geolocation.OrderedDict())
+
+
+def answer_lookups(monkeypatch, fail_batches=(), drop_refs=()):
+    """Patch requests.get with a fake /lookup that answers every ref except drop_refs."""
+    calls = []
+
+    def fake_get(url, params, headers, timeout):
+        refs = params["osm_ids"].split(",")
+        calls.append(refs)
+        if len(calls) - 1 in fail_batches:
+            return FakeResponse([], status_code=503)
+        items = [{"osm_type": "relation", "osm_id": int(ref[1:]), "geojson": polygon(ref)} for ref in refs if ref not in drop_refs]
+        return FakeResponse(items)
+
+    monkeypatch.setattr(geolocation.requests, "get", fake_get)
+    return calls
+
+
+def test_lookups_are_sent_in_batches_of_fifty(monkeypatch):
+    calls = answer_lookups(monkeypatch)
+    refs = [f"R{i}" for i in range(120)]
+
+    polygons = GeoDataMethods.fetch_polygons(refs, GeoFetchStats())
+
+    assert [len(batch) for batch in calls] == [50, 50, 20]
+    assert set(polygons) == set(refs)
+
+
+def test_failed_batch_is_not_cached(monkeypatch):
+    calls = answer_lookups(monkeypatch, fail_batches={0})
+    refs = [f"R{i}" for i in range(60)]
+
+    polygons = GeoDataMethods.fetch_polygons(refs)
+    assert set(polygons) == set(refs[50:])
+
+    # The failed refs are looked up again, the answered ones come from the cache
+    GeoDataMethods.fetch_polygons(refs)
+    assert calls[-1] == refs[:50]
+
+
+def test_resolve_keeps_records_pending_when_the_lookup_fails(monkeypatch):
+    answer_lookups(monkeypatch, fail_batches={0})
+    record = {"Polygon_Pending": True, "Geometry": None, "Geo_Locations": [{"OSM_Ref": "R1"}]}
+    stats = GeoFetchStats(polygons_deferred=1)
+
+    GeoDataMethods.resolve_polygons([record], stats)
+
+    assert record["Polygon_Pending"] is True
+    assert stats.polygons_deferred == 1
+
+
+def test_cache_is_bounded(monkeypatch):
+    answer_lookups(monkeypatch)
+    monkeypatch.setattr(geolocation, "POLYGON_CACHE_SIZE", 10)
+
+    GeoDataMethods.fetch_polygons([f"R{i}" for i in range(25)])
+
+    assert list(GeoDataMethods._polygon_cache) == [f"R{i}" for i in range(15, 25)]
+
+
+def test_savings_estimate_has_a_default_before_any_lookup(monkeypatch):
+    monkeypatch.setattr(GeoDataMethods, "_polygon_totals", {"refs": 0, "bytes": 0, "latency": 0.0})
+
+    report = GeoFetchStats(polygons_deferred=2).report()
+
+    assert report["estimated_bytes_saved"] == 2 * geolocation.DEFAULT_POLYGON_BYTES
+
+
+@pytest.mark.parametrize("geometry_format", geolocation.GEOMETRY_FORMATS)
+def test_geometry_round_trips_through_every_format(geometry_format):
+    for geometry in (Point(114.3, 30.6), shape(polygon("R1"))):
+        encoded = GeoDataMethods.encode_geometry(geometry, geometry_format)
+        assert GeoDataMethods.decode_geometry(encoded).equals(geometry)
+
+
+def test_wkb_is_base64_text_and_raw_bytes_decode_too():
+    point = Point(1.5, -2.25)
+    encoded = GeoDataMethods.encode_geometry(point, "wkb")
+
+    assert isinstance(encoded, str)
+    assert GeoDataMethods.decode_geometry(wkb.dumps(point)).equals(point)
+    assert GeoDataMethods.decode_geometry(None) is None
+    assert GeoDataMethods.decode_geometry(point) is point
+
+
+def test_unknown_geometry_format_is_rejected():
+    with pytest.raises(ValueError):
+        GeoDataMethods.encode_geometry(Point(0, 0), "kml")
+
+
+def test_categorize_uses_a_point_until_the_polygon_is_fetched():
+    search_result = [{"lat": "30.6", "lon": "114.3", "osm_type": "relation", "osm_id": 1}]
+    frame = GeoDataMethods.categorize_geojson(pd.DataFrame({"Geo_Data": [search_result]}))
+
+    assert frame.at[0, "Geometry"].geom_type == "Point"
+    assert frame.at[0, "GeoJSON"]["type"] == "Point"
+    assert frame.at[0, "Polygon_Pending"]
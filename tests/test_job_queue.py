@@ -0,0 +1,71 @@
+import time
+
+from src.pipeline.job_queue import JobQueue
+
+
+def make_queue(tmp_path, documents=1, max_attempts=3):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"), max_attempts=max_attempts)
+    queue.enqueue([{"id": f"doc-{i}", "text": f"text {i}"} for i in range(documents)])
+    return queue
+
+
+def test_jobs_are_leased_once_in_order(tmp_path):
+    queue = make_queue(tmp_path, documents=2)
+
+    first = queue.lease("worker-a")
+    second = queue.lease("worker-b")
+
+    assert [first["payload"]["id"], second["payload"]["id"]] == ["doc-0", "doc-1"]
+    assert queue.lease("worker-c") is None
+    assert queue.progress() == {"queued": 0, "leased": 2, "done": 0, "dead": 0}
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    queue = make_queue(tmp_path)
+    job = queue.lease("worker-a", lease_seconds=0.05)
+    time.sleep(0.1)
+
+    takeover = queue.lease("worker-b")
+
+    assert takeover["id"] == job["id"]
+    assert takeover["attempt"] == 2
+    # The original worker lost the job and can no longer report on it
+    assert not queue.heartbeat(job["id"], "worker-a")
+    assert not queue.complete(job["id"], "worker-a", {"ok": True})
+    assert queue.complete(job["id"], "worker-b", {"ok": True})
+    assert queue.results("done")[0]["result"] == {"ok": True}
+
+
+def test_heartbeat_keeps_the_lease(tmp_path):
+    queue = make_queue(tmp_path)
+    job = queue.lease("worker-a", lease_seconds=0.1)
+    time.sleep(0.06)
+    assert queue.heartbeat(job["id"], "worker-a", lease_seconds=0.1)
+    time.sleep(0.06)
+
+    assert queue.lease("worker-b") is None
+
+
+def test_failed_job_is_dead_lettered_after_max_attempts(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2)
+    for attempt in range(2):
+        job = queue.lease("worker")
+        assert job["attempt"] == attempt + 1
+        queue.fail(job["id"], "worker", f"error {attempt}")
+
+    assert queue.lease("worker") is None
+    dead = queue.results("dead")
+    assert [(row["doc_id"], row["attempts"], row["error"]) for row in dead] == [("doc-0", 2, "error 1")]
+
+    assert queue.requeue_dead() == 1
+    assert queue.lease("worker")["attempt"] == 1
+
+
+def test_abandoned_job_is_dead_lettered_on_its_final_attempt(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=1)
+    queue.lease("worker", lease_seconds=0.05)
+    time.sleep(0.1)
+
+    assert queue.progress()["dead"] == 1
+    assert queue.results("dead")[0]["error"] == "Lease expired on the final attempt"
+    assert queue.lease("worker") is None
@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+from src.components.rate_limiter import current_priority
+from src.pipeline.job_scheduler import JobScheduler, PriorityClass
+
+
+def test_interactive_jobs_jump_queued_bulk_work():
+    release, order = threading.Event(), []
+
+    def handler(name):
+        if name == "blocker":
+            release.wait()
+        order.append(name)
+        return name
+
+    scheduler = JobScheduler(handler, max_workers=1, classes=[
+        PriorityClass("interactive", weight=8, max_concurrency=1),
+        PriorityClass("bulk", weight=1, max_concurrency=1),
+    ])
+    blocker = scheduler.submit("blocker", priority="bulk")
+    time.sleep(0.05)
+    futures = [scheduler.submit(f"bulk-{i}", priority="bulk") for i in range(3)]
+    futures.append(scheduler.submit("interactive", priority="interactive"))
+    release.set()
+    for future in [blocker] + futures:
+        future.result(timeout=5)
+    scheduler.shutdown()
+
+    assert order[:2] == ["blocker", "interactive"]
+
+
+def test_bulk_concurrency_cap_leaves_a_worker_for_interactive():
+    release, running, peak = threading.Event(), [], []
+    lock = threading.Lock()
+
+    def handler(name):
+        with lock:
+            running.append(name)
+            peak.append(len(running))
+        if name.startswith("bulk"):
+            release.wait()
+        with lock:
+            running.remove(name)
+        return name
+
+    scheduler = JobScheduler(handler, max_workers=2)
+    bulk = [scheduler.submit(f"bulk-{i}", priority="bulk") for i in range(3)]
+    time.sleep(0.05)
+    assert scheduler.stats()["bulk"]["running"] == 1
+    assert scheduler.submit("interactive", priority="interactive").result(timeout=5) == "interactive"
+    release.set()
+    for future in bulk:
+        future.result(timeout=5)
+    scheduler.shutdown()
+
+
+def test_jobs_still_queued_at_their_deadline_time_out():
+    release = threading.Event()
+    scheduler = JobScheduler(lambda name: release.wait(), max_workers=1)
+    scheduler.submit("blocker")
+    time.sleep(0.05)
+    late = scheduler.submit("late", timeout=0.1)
+
+    # Expired while the only worker is still busy, not when it frees up
+    with pytest.raises(TimeoutError, match="deadline"):
+        late.result(timeout=1)
+    release.set()
+    scheduler.shutdown()
+    assert scheduler.stats()["normal"]["expired"] == 1
+
+
+def test_jobs_run_in_their_priority_class():
+    scheduler = JobScheduler(lambda: current_priority.get(), max_workers=1)
+
+    assert scheduler.submit(priority="bulk").result(timeout=5) == "bulk"
+    assert scheduler.submit(priority="interactive").result(timeout=5) == "interactive"
+    scheduler.shutdown()
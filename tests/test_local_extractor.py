@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from src.components.local_extractor import CascadeProcessor, LocalExtraction, LocalExtractor, RuleBasedExtractor
+
+THRESHOLD = 0.8
+
+
+@pytest.fixture(scope="module")
+def extractor():
+    return RuleBasedExtractor()
+
+
+def test_known_places_are_kept_with_their_country(extractor):
+    extraction = extractor.extract("Heavy rain caused flooding in Lagos, Nigeria on Monday.", "locations")
+
+    assert extraction.output == "Event Locations: [Lagos, Nigeria]"
+    assert extraction.confidence >= THRESHOLD
+
+
+@pytest.mark.parametrize("text", [
+    "Floods hit Bayelsa and Lagos",
+    "Rebels attacked Goma, Congo",
+    "Rebels attacked Goma, Congo, near the border with Rwanda.",
+    "Flooding was reported in Zhengzhou overnight.",
+])
+def test_places_missing_from_the_gazetteer_escalate(extractor, text):
+    extraction = extractor.extract(text, "locations")
+
+    assert extraction.confidence < THRESHOLD
+    assert extraction.reason
+
+
+def test_organisations_naming_a_place_do_not_escalate_locations(extractor):
+    text = "The Kenya National Commission on Human Rights condemned the evictions in Nairobi."
+
+    assert extractor.extract(text, "locations").confidence >= THRESHOLD
+
+
+@pytest.mark.parametrize("date", ["2023-10-19", "2023/10/19", "12.10.2023", "19-10-2023"])
+def test_dates_are_not_phone_numbers(extractor, date):
+    extraction = extractor.extract(f"The report published on {date} lists no contacts.", "phone_numbers")
+
+    assert extraction.output == "Phone Numbers: None"
+
+
+def test_phone_numbers_next_to_dates_are_kept(extractor):
+    extraction = extractor.extract("On 2023-10-19 the hotline +44 20 7946 0958 opened.", "phone_numbers")
+
+    assert extraction.output == "Phone Numbers: +44 20 7946 0958"
+    assert extraction.confidence >= THRESHOLD
+
+
+def test_organisations_and_cued_people(extractor):
+    text = "The World Health Organization (WHO) sent teams, Dr Tedros Ghebreyesus said."
+
+    assert extractor.extract(text, "entities").output == "Entities: World Health Organization (WHO)"
+    assert extractor.extract(text, "names").output == "Entities: Tedros Ghebreyesus"
+
+
+def test_extractor_interface_is_abstract():
+    class Incomplete(LocalExtractor):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+class FixedExtractor(LocalExtractor):
+    def __init__(self, confidence):
+        self.confidence = confidence
+
+    def extract(self, text, prompt_type):
+        return LocalExtraction(f"local {prompt_type}", self.confidence, "fixed")
+
+
+class FakeRemote:
+    def __init__(self):
+        self.calls = []
+
+    def process_text(self, text, prompt_type):
+        self.calls.append(prompt_type)
+        return f"remote {prompt_type}"
+
+    async def process_text_async(self, text, prompt_type):
+        return self.process_text(text, prompt_type)
+
+
+def test_cascade_keeps_confident_answers_and_escalates_the_rest():
+    remote = FakeRemote()
+    confident = CascadeProcessor(FixedExtractor(0.9), remote, threshold=THRESHOLD)
+    unsure = CascadeProcessor(FixedExtractor(0.5), remote, threshold=THRESHOLD)
+
+    assert confident.process_text("text", "names") == "local names"
+    assert unsure.process_text("text", "names") == "remote names"
+    assert asyncio.run(unsure.process_text_async("text", "entities")) == "remote entities"
+    assert remote.calls == ["names", "entities"]
+    assert confident.stats() == {"names": {"local": 1, "escalated": 0}}
+
+
+def test_event_types_escalate_by_default_and_can_be_opted_in():
+    remote = FakeRemote()
+
+    assert CascadeProcessor(FixedExtractor(1.0), remote).process_text("text", "event_type") == "remote event_type"
+    opted_in = CascadeProcessor(FixedExtractor(0.9), remote, thresholds={"event_type": 0.85})
+    assert opted_in.process_text("text", "event_type") == "local event_type"
+
+
+def test_local_failures_escalate():
+    class Broken(LocalExtractor):
+        def extract(self, text, prompt_type):
+            raise RuntimeError("boom")
+
+    assert CascadeProcessor(Broken(), FakeRemote()).process_text("text", "names") == "remote names"
@@ -0,0 +1,97 @@
+import pytest
+
+from src.components.event import ContentExtractor
+from src.pipeline.batch import BatchProcessor
+from src.pipeline.checkpoint import CheckpointStore
+
+
+@pytest.mark.parametrize("prompt_type, answer", [
+    ("event_type", "Event Type: Flood, Landslide"),
+    ("event_type", "Event Types: Flood"),
+    ("entities", "Entities: World Health Organization (WHO)"),
+    ("names", "Entities: None"),
+    ("names", "Entities:"),
+    ("phone_numbers", "Phone Numbers: None"),
+    ("phone_numbers", "Phone Numbers:"),
+    ("locations", "Event Locations: [Paris, France; Lyon, France]"),
+    ("locations", "Event Locations: []"),
+    ("locations", "Event Locations: None"),
+])
+def test_valid_answers(prompt_type, answer):
+    assert ContentExtractor.is_valid_answer(answer, prompt_type)
+
+
+@pytest.mark.parametrize("prompt_type, answer", [
+    ("event_type", "Flood, Landslide"),
+    ("event_type", "Event Type: Flood Event Type: Fire"),
+    ("entities", "Phone Numbers: None"),
+    ("locations", "Event Locations: [Berlin, Germany"),
+    ("locations", "Event Locations: [A]; [B]"),
+    ("locations", "Event Locations: Paris, France"),
+])
+def test_garbled_answers(prompt_type, answer):
+    assert not ContentExtractor.is_valid_answer(answer, prompt_type)
+
+
+def test_split_keeps_only_well_formed_unique_answers():
+    output = "\n".join([
+        "[1] Event Locations: [Paris, France]",
+        "[2] Event Locations: [Berlin",
+        "[3] Event Locations: []",
+        "[4] Event Locations: [Rome, Italy]",
+        "[4] Event Locations: [Milan, Italy]",
+        "[9] Event Locations: [Oslo, Norway]",
+    ])
+
+    answers = ContentExtractor.split_packed_answers(output, ["1", "2", "3", "4", "5"], "locations")
+
+    assert answers == {"1": "Event Locations: [Paris, France]", "3": "Event Locations: []"}
+
+
+class FakeChatProcessor:
+    def __init__(self, reply):
+        self.reply = reply
+        self.packs = []
+
+    def process_packed(self, documents, prompt_type, answer_tokens):
+        self.packs.append((prompt_type, [doc_id for doc_id, _ in documents]))
+        return self.reply(prompt_type, documents)
+
+
+class FakeExplorer:
+    def __init__(self, directory, reply):
+        self.chat_processor = FakeChatProcessor(reply)
+        self.checkpoints = CheckpointStore(directory)
+        self.content_extractor = ContentExtractor()
+
+    @staticmethod
+    def checkpoint_key(text):
+        return str(abs(hash(text)))
+
+
+def empty_answers(prompt_type, documents):
+    label = {"event_type": "Event Type", "entities": "Entities", "names": "Entities",
+             "phone_numbers": "Phone Numbers", "locations": "Event Locations"}[prompt_type]
+    return "\n".join(f"[{doc_id}] {label}: None" for doc_id, _ in documents)
+
+
+def test_prefill_checkpoints_empty_answers_without_fallbacks(tmp_path):
+    explorer = FakeExplorer(str(tmp_path), empty_answers)
+    texts = [f"Short alert number {i}." for i in range(4)]
+
+    batch = BatchProcessor(explorer)
+    batch.prefill(texts)
+
+    assert batch.stats["fallbacks"] == 0
+    assert explorer.checkpoints.load(explorer.checkpoint_key(texts[0]))["phone_numbers"] == "Phone Numbers: None"
+
+
+def test_pack_limit_never_drops_below_two(tmp_path):
+    explorer = FakeExplorer(str(tmp_path), lambda prompt_type, documents: "garbled")
+    batch = BatchProcessor(explorer, max_pack_size=8)
+    for _ in range(5):
+        batch._adapt("names", batch._pack_limits["names"], 0)
+
+    assert batch._pack_limits["names"] == 2
+    batch.prefill([f"Short alert number {i}." for i in range(4)])
+    assert all(len(doc_ids) == 2 for prompt_type, doc_ids in explorer.chat_processor.packs if prompt_type == "names")
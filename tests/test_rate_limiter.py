@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+
+from src.components.rate_limiter import RequestScheduler, request_priority
+
+
+class RateLimitError(Exception):
+    def __init__(self, headers):
+        super().__init__("429 Too Many Requests")
+        self.status_code = 429
+        self.response = type("Response", (), {"headers": headers})()
+
+
+class FakeCompletions:
+    def __init__(self, failures, headers):
+        self.failures = failures
+        self.headers = headers
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(time.monotonic())
+        if len(self.calls) <= self.failures:
+            raise RateLimitError(self.headers)
+        return type("Response", (), {"usage": None, "content": "ok"})()
+
+
+class FakeClient:
+    def __init__(self, completions):
+        self.chat = type("Chat", (), {"completions": completions})()
+        self.options = []
+
+    def with_options(self, **options):
+        self.options.append(options)
+        return self
+
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+def test_429_pauses_for_retry_after_then_succeeds():
+    completions = FakeCompletions(failures=1, headers={"retry-after-ms": "200"})
+    client = FakeClient(completions)
+    scheduler = RequestScheduler(max_retries=2)
+
+    response = scheduler.create_completion(client, "model", MESSAGES, max_tokens=16)
+
+    assert response.content == "ok"
+    assert len(completions.calls) == 2
+    assert completions.calls[1] - completions.calls[0] >= 0.19
+    assert scheduler.stats()["throttled"] == 1
+    assert client.options == [{"max_retries": 0}]
+
+
+def test_429_cuts_the_model_rate():
+    completions = FakeCompletions(failures=1, headers={"retry-after-ms": "10"})
+    scheduler = RequestScheduler(requests_per_minute=100, max_retries=1)
+
+    scheduler.create_completion(FakeClient(completions), "model", MESSAGES, max_tokens=16)
+
+    assert scheduler.stats()["models"]["model"]["requests_per_minute"] < 100
+
+
+def test_429_is_raised_once_retries_are_used_up():
+    completions = FakeCompletions(failures=5, headers={"retry-after-ms": "10"})
+    scheduler = RequestScheduler(max_retries=1)
+
+    with pytest.raises(RateLimitError):
+        scheduler.create_completion(FakeClient(completions), "model", MESSAGES, max_tokens=16)
+    assert len(completions.calls) == 2
+
+
+def test_higher_priority_waiters_are_admitted_first():
+    scheduler = RequestScheduler(requests_per_minute=300, burst_seconds=0.1)
+    scheduler.acquire("model", 1)  # drain the single request of burst
+    order = []
+
+    def wait_for_admission(priority):
+        scheduler.acquire("model", 1, priority)
+        order.append(priority)
+
+    threads = [threading.Thread(target=wait_for_admission, args=(priority,)) for priority in ("bulk", "normal", "interactive")]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join()
+
+    assert order == ["interactive", "normal", "bulk"]
+
+
+def test_priority_defaults_to_the_enclosing_job_class():
+    scheduler = RequestScheduler(requests_per_minute=300, burst_seconds=0.1)
+    scheduler.acquire("model", 1)
+    order = []
+
+    def wait_for_admission(priority):
+        with request_priority(priority):
+            scheduler.acquire("model", 1)
+        order.append(priority)
+
+    threads = [threading.Thread(target=wait_for_admission, args=(priority,)) for priority in ("bulk", "interactive")]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join()
+
+    assert order == ["interactive", "bulk"]
+
+
+def test_header_limits_are_scaled_to_the_schedulers_share():
+    fleet_worker = RequestScheduler(requests_per_minute=15, share=0.25)
+    single = RequestScheduler(requests_per_minute=15)
+    headers = {"x-ratelimit-limit-requests": "60"}
+
+    for _ in range(100):
+        fleet_worker.update_from_headers("model", headers)
+        single.update_from_headers("model", headers)
+
+    assert fleet_worker.stats()["models"]["model"]["requests_per_minute"] == 15
+    assert single.stats()["models"]["model"]["requests_per_minute"] == 60
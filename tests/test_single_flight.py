@@ -0,0 +1,150 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.components.single_flight import SingleFlight
+
+
+def slow_double(value, calls, delay=0.2):
+    calls.append(value)
+    time.sleep(delay)
+    return value * 2
+
+
+def test_concurrent_identical_calls_run_once():
+    flight, calls = SingleFlight("test"), []
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        results = list(pool.map(lambda _: flight.do("key", slow_double, 21, calls), range(5)))
+
+    assert results == [42] * 5
+    assert calls == [21]
+    assert flight.stats() == {"calls": 5, "executions": 1, "coalesced": 4, "wait_expired": 0, "in_flight": 0}
+
+
+def test_calls_after_completion_run_again():
+    flight, calls = SingleFlight("test"), []
+    flight.do("key", slow_double, 1, calls, delay=0)
+    flight.do("key", slow_double, 1, calls, delay=0)
+
+    assert calls == [1, 1]
+
+
+def test_exception_is_shared_with_followers():
+    flight = SingleFlight("test")
+    started = threading.Event()
+
+    def fail():
+        started.set()
+        time.sleep(0.2)
+        raise RuntimeError("boom")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "key", fail)
+        started.wait()
+        follower = pool.submit(flight.do, "key", fail)
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError, match="boom"):
+                future.result()
+    assert flight.stats()["executions"] == 1
+
+
+def test_follower_never_shares_a_call_that_gives_up_sooner():
+    flight, calls = SingleFlight("test"), []
+    now = time.monotonic()
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        leader = pool.submit(flight.do, "key", slow_double, 1, calls, deadline=now + 1)
+        time.sleep(0.05)
+        later = pool.submit(flight.do, "key", slow_double, 2, calls, deadline=now + 2)
+        unbounded = pool.submit(flight.do, "key", slow_double, 3, calls)
+        results = [future.result() for future in (leader, later, unbounded)]
+
+    assert results == [2, 4, 6]
+    assert sorted(calls) == [1, 2, 3]
+
+
+def test_follower_with_a_deadline_stops_waiting_at_it():
+    flight, calls = SingleFlight("test"), []
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        # The leader has no deadline and takes a while
+        leader = pool.submit(flight.do, "key", slow_double, 1, calls, delay=1.0)
+        time.sleep(0.05)
+        start = time.monotonic()
+        follower = pool.submit(flight.do, "key", slow_double, 2, calls, delay=0, deadline=start + 0.1)
+        assert follower.result() == 4
+        waited = time.monotonic() - start
+        # An earlier deadline than the leader's also joins, and still waits no longer than it
+        sooner = pool.submit(flight.do, "key", slow_double, 3, calls, delay=0, deadline=time.monotonic() + 0.1)
+        assert sooner.result() == 6
+        leader.result()
+
+    assert waited < 0.5
+    assert calls == [1, 2, 3]
+    assert flight.stats()["wait_expired"] == 2
+
+
+def test_follower_with_a_deadline_shares_a_call_that_finishes_in_time():
+    flight, calls = SingleFlight("test"), []
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "key", slow_double, 1, calls, delay=0.1)
+        time.sleep(0.02)
+        follower = pool.submit(flight.do, "key", slow_double, 1, calls, deadline=time.monotonic() + 1)
+        assert [leader.result(), follower.result()] == [2, 2]
+
+    assert calls == [1]
+
+
+def test_cancelling_the_async_leader_does_not_cancel_followers():
+    flight, calls = SingleFlight("test"), []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.2)
+        return "done"
+
+    async def scenario():
+        leader = asyncio.ensure_future(flight.do_async("key", work))
+        await asyncio.sleep(0.05)
+        follower = asyncio.ensure_future(flight.do_async("key", work))
+        await asyncio.sleep(0.05)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == "done"
+    assert calls == [1]
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_async_and_threaded_callers_share_one_call():
+    flight, calls = SingleFlight("test"), []
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do_async("key", slow_double, 5, calls) for _ in range(3)))
+
+    assert asyncio.run(scenario()) == [10, 10, 10]
+    assert calls == [5]
+
+
+def test_async_follower_with_a_deadline_stops_waiting_at_it():
+    flight, calls = SingleFlight("test"), []
+
+    async def work(value, delay):
+        calls.append(value)
+        await asyncio.sleep(delay)
+        return value
+
+    async def scenario():
+        leader = asyncio.ensure_future(flight.do_async("key", work, 1, 0.5))
+        await asyncio.sleep(0.02)
+        start = time.monotonic()
+        follower = await flight.do_async("key", work, 2, 0, deadline=start + 0.05)
+        waited = time.monotonic() - start
+        return follower, waited, await leader
+
+    follower, waited, leader = asyncio.run(scenario())
+    assert (follower, leader) == (2, 1)
+    assert waited < 0.3